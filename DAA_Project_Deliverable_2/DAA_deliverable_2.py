@@ -5,12 +5,32 @@ Run: python integrated_app.py
 Access: http://localhost:5000
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, send_file, make_response, g, has_request_context, url_for, stream_with_context
 import math
 import time
+import io
 import json
 import os
 import random
+import mmap
+import heapq
+import zlib
+import struct
+from array import array
+import hashlib
+import argparse
+import bisect
+import sys
+import tempfile
+import uuid
+import cProfile
+import functools
+import threading
+from collections import Counter, OrderedDict
+from operator import itemgetter, add, sub, mul, and_
+from itertools import chain, compress, islice, repeat
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from datetime import datetime
 from werkzeug.utils import secure_filename
 
@@ -18,6 +38,33 @@ app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['DATASET_FOLDER'] = 'datasets'
+app.config['OP_COUNTERS'] = True
+app.config['PROFILING_ENABLED'] = False
+app.config['PROFILE_FOLDER'] = 'profiles'
+app.config['PROFILE_KEEP'] = 20
+app.config['PROFILE_INTERVAL'] = 0.001
+app.config['APPLY_JOBS'] = 1
+app.config['BATCH_ALL_NEAREST'] = False
+app.config['ND_DIMENSIONS'] = []
+app.config['INCREMENTAL_APPLY'] = True
+app.config['JOB_WORKERS'] = 2
+app.config['JOB_MAX_PENDING'] = 16
+app.config['JOB_HISTORY'] = 50
+app.config['RESULT_CACHE_BYTES'] = 64 * 1024 * 1024
+app.config['RESULT_CACHE_DIR'] = None
+app.config['RESULT_CACHE_DISK_BYTES'] = 1024 * 1024 * 1024
+app.config['DATASET_STORE_BYTES'] = 256 * 1024 * 1024
+app.config['DATASET_PRELOAD'] = False
+app.config['COMPACT_FLOAT32'] = False
+app.config['MAX_VIS_POINTS'] = 5000
+app.config['TOP_PAIRS_MAX_K'] = 1000
+app.config['APPROX_MIN_POINTS'] = 200000
+app.config['APPROX_EPSILON'] = 0.1
+app.config['HEATMAP_MIN_POINTS'] = 100000
+app.config['TILE_MAX_ZOOM'] = 12
+app.config['TILE_CACHE_ENTRIES'] = 512
+app.config['TILE_DATASET_ENTRIES'] = 8
+app.config['KDTREE_RANGE_LIMIT'] = 10000
 
 # Create necessary directories
 os.makedirs('uploads', exist_ok=True)
@@ -30,144 +77,3286 @@ os.makedirs('datasets', exist_ok=True)
 def distance(p1, p2):
     return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
 
-def brute_force_closest(points):
-    min_dist = float('inf')
+# Kernels work in each metric's comparison space: squared distance for
+# Euclidean (one sqrt at the very end), plain distance for L1 and L-infinity.
+# Strips arrive sorted by y and already filtered to the split's band.
+
+def brute_force_squared(points, counters=None):
+    best = float('inf')
     n = len(points)
     pair = None
     
     for i in range(n):
+        xi, yi = points[i]
         for j in range(i + 1, n):
-            dist = distance(points[i], points[j])
-            if dist < min_dist:
-                min_dist = dist
+            dx = points[j][0] - xi
+            dy = points[j][1] - yi
+            d2 = dx * dx + dy * dy
+            if d2 < best:
+                best = d2
                 pair = (points[i], points[j])
     
-    return pair, min_dist
+    if counters is not None:
+        counters['distance_evals'] += n * (n - 1) // 2
+        counters['brute_force_evals'] += n * (n - 1) // 2
+    
+    return pair, best
 
-def strip_closest(strip, d):
-    min_dist = d
-    strip.sort(key=lambda point: point[1])
+def strip_squared(strip, best, counters=None):
+    pair = None
+    
+    for i in range(len(strip)):
+        xi, yi = strip[i]
+        j = i + 1
+        while j < len(strip):
+            dy = strip[j][1] - yi
+            if dy * dy >= best:
+                break
+            dx = strip[j][0] - xi
+            d2 = dx * dx + dy * dy
+            if d2 < best:
+                best = d2
+                pair = (strip[i], strip[j])
+            j += 1
+        
+        # Counted once per strip point, never per comparison
+        if counters is not None:
+            span = j - i - 1
+            counters['distance_evals'] += span
+            counters['strip_evals'] += span
+            if span > counters['max_strip_span']:
+                counters['max_strip_span'] = span
+    
+    return pair, best
+
+def brute_force_manhattan(points, counters=None):
+    best = float('inf')
+    n = len(points)
+    pair = None
+    
+    for i in range(n):
+        xi, yi = points[i]
+        for j in range(i + 1, n):
+            dist = abs(points[j][0] - xi) + abs(points[j][1] - yi)
+            if dist < best:
+                best = dist
+                pair = (points[i], points[j])
+    
+    if counters is not None:
+        counters['distance_evals'] += n * (n - 1) // 2
+        counters['brute_force_evals'] += n * (n - 1) // 2
+    
+    return pair, best
+
+def strip_manhattan(strip, best, counters=None):
+    # |dy| alone already bounds L1 from below, so the y cut-off is the same as Euclidean's
+    pair = None
+    
+    for i in range(len(strip)):
+        xi, yi = strip[i]
+        j = i + 1
+        while j < len(strip):
+            dy = strip[j][1] - yi
+            if dy >= best:
+                break
+            dist = abs(strip[j][0] - xi) + dy
+            if dist < best:
+                best = dist
+                pair = (strip[i], strip[j])
+            j += 1
+        
+        if counters is not None:
+            span = j - i - 1
+            counters['distance_evals'] += span
+            counters['strip_evals'] += span
+            if span > counters['max_strip_span']:
+                counters['max_strip_span'] = span
+    
+    return pair, best
+
+def brute_force_chebyshev(points, counters=None):
+    best = float('inf')
+    n = len(points)
+    pair = None
+    
+    for i in range(n):
+        xi, yi = points[i]
+        for j in range(i + 1, n):
+            dist = max(abs(points[j][0] - xi), abs(points[j][1] - yi))
+            if dist < best:
+                best = dist
+                pair = (points[i], points[j])
+    
+    if counters is not None:
+        counters['distance_evals'] += n * (n - 1) // 2
+        counters['brute_force_evals'] += n * (n - 1) // 2
+    
+    return pair, best
+
+def strip_chebyshev(strip, best, counters=None):
     pair = None
     
     for i in range(len(strip)):
+        xi, yi = strip[i]
         j = i + 1
-        while j < len(strip) and (strip[j][1] - strip[i][1]) < min_dist:
-            dist = distance(strip[i], strip[j])
-            if dist < min_dist:
-                min_dist = dist
+        while j < len(strip):
+            dy = strip[j][1] - yi
+            if dy >= best:
+                break
+            dist = max(abs(strip[j][0] - xi), dy)
+            if dist < best:
+                best = dist
                 pair = (strip[i], strip[j])
             j += 1
+        
+        if counters is not None:
+            span = j - i - 1
+            counters['distance_evals'] += span
+            counters['strip_evals'] += span
+            if span > counters['max_strip_span']:
+                counters['max_strip_span'] = span
+    
+    return pair, best
+
+# (brute force, strip) kernels per planar metric; haversine is handled separately
+METRIC_KERNELS = {
+    'euclidean': (brute_force_squared, strip_squared),
+    'manhattan': (brute_force_manhattan, strip_manhattan),
+    'chebyshev': (brute_force_chebyshev, strip_chebyshev)
+}
+# Plain point-to-point distance per planar metric, for callers without a kernel
+METRIC_DISTANCES = {
+    'euclidean': distance,
+    'manhattan': lambda p1, p2: abs(p1[0] - p2[0]) + abs(p1[1] - p2[1]),
+    'chebyshev': lambda p1, p2: max(abs(p1[0] - p2[0]), abs(p1[1] - p2[1]))
+}
+DISTANCE_METRICS = ('euclidean', 'manhattan', 'chebyshev', 'haversine')
+EARTH_RADIUS_KM = 6371.0088
+
+def brute_force_closest(points, counters=None):
+    pair, d2 = brute_force_squared(points, counters)
+    return pair, math.sqrt(d2)
+
+def strip_closest(strip, d, counters=None):
+    strip.sort(key=lambda point: point[1])
+    pair, d2 = strip_squared(strip, d * d, counters)
+    if pair is None:
+        return None, d
+    return pair, math.sqrt(d2)
+
+def closest_pair_recursive(px, py, counters=None, depth=0, metric='euclidean'):
+    """Returns (pair, key) where key is the metric's comparison value (squared for Euclidean).
+    
+    px must be sorted lexicographically by (x, y) and hold no duplicates. Halves
+    are split by rank in that order rather than by x alone, so points sharing
+    the median x (vertical lines, grids) still divide evenly.
+    """
+    n = len(px)
+    brute_force, strip_scan = METRIC_KERNELS[metric]
+    
+    if counters is not None:
+        counters['nodes'] += 1
+        if depth > counters['max_depth']:
+            counters['max_depth'] = depth
+    
+    if n <= 3:
+        if counters is not None:
+            counters['base_case_hits'] += 1
+        return brute_force(px, counters)
+    
+    mid = n // 2
+    midpoint = px[mid]
+    
+    if px[mid - 1][0] < midpoint[0]:
+        pyl = [p for p in py if p[0] < midpoint[0]]
+        pyr = [p for p in py if p[0] >= midpoint[0]]
+    else:
+        # The median x is shared across the split; fall back to comparing (x, y)
+        pyl = [p for p in py if p < midpoint]
+        pyr = [p for p in py if not p < midpoint]
+    
+    pair_left, dl = closest_pair_recursive(px[:mid], pyl, counters, depth + 1, metric)
+    pair_right, dr = closest_pair_recursive(px[mid:], pyr, counters, depth + 1, metric)
+    
+    if dl < dr:
+        d = dl
+        min_pair = pair_left
+    else:
+        d = dr
+        min_pair = pair_right
+    
+    mid_x = midpoint[0]
+    if metric == 'euclidean':
+        strip = [p for p in py if (p[0] - mid_x) * (p[0] - mid_x) < d]
+    else:
+        strip = [p for p in py if abs(p[0] - mid_x) < d]
+    strip_pair, strip_dist = strip_scan(strip, d, counters)
+    
+    if strip_pair and strip_dist < d:
+        return strip_pair, strip_dist
+    else:
+        return min_pair, d
+
+def closest_pair_of_points(points, counters=None, metric='euclidean'):
+    if len(points) < 2:
+        return None, float('inf')
+    if metric == 'haversine':
+        return haversine_closest_pair(points, counters)
+    
+    px = sorted(map(tuple, points))
+    # Exact duplicates are the answer under every metric; this also leaves the
+    # recursion with distinct points, which the rank split relies on
+    for a, b in zip(px, px[1:]):
+        if a == b:
+            return (a, b), 0.0
+    py = sorted(px, key=itemgetter(1))
+    
+    pair, d = closest_pair_recursive(px, py, counters, metric=metric)
+    return pair, math.sqrt(d) if metric == 'euclidean' else d
+
+def anytime_closest_pair(points, counters=None, sample_size=None):
+    """Yield (pair, dist) every time the best known pair improves; the last one is exact.
+    
+    The first value comes from the exact closest pair of a random sample of
+    about 2 * sqrt(n) points, so a usable upper bound appears almost at once.
+    The divide and conquer then runs against that global best, which also
+    narrows every strip, and reports each improvement as it is found.
+    """
+    if len(points) < 2:
+        return
+    
+    px = sorted(map(tuple, points))
+    for a, b in zip(px, px[1:]):
+        if a == b:
+            yield (a, b), 0.0
+            return
+    py = sorted(px, key=itemgetter(1))
+    
+    n = len(px)
+    m = sample_size or min(n, max(2, 2 * math.isqrt(n)))
+    pair, dist = closest_pair_of_points(random.sample(px, m))
+    best = [dist * dist, pair]
+    yield pair, dist
+    
+    yield from anytime_closest_pair_recursive(px, py, best, counters)
+
+def anytime_closest_pair_recursive(px, py, best, counters=None, depth=0):
+    """Rank-split recursion against the shared best = [d2, pair], yielding improvements"""
+    n = len(px)
+    
+    if counters is not None:
+        counters['nodes'] += 1
+        if depth > counters['max_depth']:
+            counters['max_depth'] = depth
+    
+    if n <= 3:
+        if counters is not None:
+            counters['base_case_hits'] += 1
+        pair, d2 = brute_force_squared(px, counters)
+        if d2 < best[0]:
+            best[:] = [d2, pair]
+            yield pair, math.sqrt(d2)
+        return
+    
+    mid = n // 2
+    midpoint = px[mid]
+    
+    if px[mid - 1][0] < midpoint[0]:
+        pyl = [p for p in py if p[0] < midpoint[0]]
+        pyr = [p for p in py if p[0] >= midpoint[0]]
+    else:
+        pyl = [p for p in py if p < midpoint]
+        pyr = [p for p in py if not p < midpoint]
+    
+    yield from anytime_closest_pair_recursive(px[:mid], pyl, best, counters, depth + 1)
+    yield from anytime_closest_pair_recursive(px[mid:], pyr, best, counters, depth + 1)
+    
+    mid_x = midpoint[0]
+    strip = [p for p in py if (p[0] - mid_x) * (p[0] - mid_x) < best[0]]
+    pair, d2 = strip_squared(strip, best[0], counters)
+    if pair is not None:
+        best[:] = [d2, pair]
+        yield pair, math.sqrt(d2)
+
+def closest_pair_exact(coords, scale=1, counters=None):
+    """Exact closest pair over integer coordinates (flat x0, y0, x1, y1, ... scaled by scale).
+    
+    Squared distances are compared as Python ints, so there is no rounding.
+    Ties are broken by the lexicographically smallest (p, q) with p < q, so the
+    answer does not depend on input order. Returns ((p, q), dist, d2) with p
+    and q unscaled to floats, dist the float distance and d2 the exact squared
+    distance in scaled units.
+    """
+    px = sorted(zip(coords[0::2], coords[1::2]))
+    if len(px) < 2:
+        return None, float('inf'), None
+    
+    for a, b in zip(px, px[1:]):
+        if a == b:
+            d2, p, q = 0, a, b
+            break
+    else:
+        py = sorted(px, key=itemgetter(1))
+        d2, p, q = closest_pair_exact_recursive(px, py, counters)
+    
+    pair = ((p[0] / scale, p[1] / scale), (q[0] / scale, q[1] / scale))
+    return pair, math.sqrt(d2 / (scale * scale)), d2
+
+def closest_pair_exact_recursive(px, py, counters=None, depth=0):
+    """(d2, p, q) minimising d2, then (p, q); px is (x, y)-sorted and duplicate free"""
+    n = len(px)
+    
+    if counters is not None:
+        counters['nodes'] += 1
+        if depth > counters['max_depth']:
+            counters['max_depth'] = depth
+    
+    if n <= 3:
+        if counters is not None:
+            counters['base_case_hits'] += 1
+            counters['distance_evals'] += n * (n - 1) // 2
+            counters['brute_force_evals'] += n * (n - 1) // 2
+        best = (math.inf, None, None)
+        for i in range(n):
+            for j in range(i + 1, n):
+                dx = px[j][0] - px[i][0]
+                dy = px[j][1] - px[i][1]
+                candidate = (dx * dx + dy * dy, px[i], px[j])
+                if candidate < best:
+                    best = candidate
+        return best
+    
+    mid = n // 2
+    midpoint = px[mid]
+    
+    if px[mid - 1][0] < midpoint[0]:
+        pyl = [p for p in py if p[0] < midpoint[0]]
+        pyr = [p for p in py if p[0] >= midpoint[0]]
+    else:
+        pyl = [p for p in py if p < midpoint]
+        pyr = [p for p in py if not p < midpoint]
+    
+    best = min(closest_pair_exact_recursive(px[:mid], pyl, counters, depth + 1),
+               closest_pair_exact_recursive(px[mid:], pyr, counters, depth + 1))
+    
+    # Inclusive bounds: a straddling pair at exactly d2 can still win the tie-break
+    d2 = best[0]
+    mid_x = midpoint[0]
+    strip = [p for p in py if (p[0] - mid_x) * (p[0] - mid_x) <= d2]
+    for i in range(len(strip)):
+        a = strip[i]
+        j = i + 1
+        while j < len(strip):
+            b = strip[j]
+            dy = b[1] - a[1]
+            if dy * dy > d2:
+                break
+            dx = b[0] - a[0]
+            c2 = dx * dx + dy * dy
+            if c2 <= d2:
+                candidate = (c2, a, b) if a < b else (c2, b, a)
+                if candidate < best:
+                    best = candidate
+                    d2 = c2
+            j += 1
+        
+        if counters is not None:
+            span = j - i - 1
+            counters['distance_evals'] += span
+            counters['strip_evals'] += span
+            if span > counters['max_strip_span']:
+                counters['max_strip_span'] = span
+    
+    return best
+
+def closest_pair_compact(coords, counters=None, slack=0.0):
+    """Closest pair straight from a flat x0, y0, x1, y1, ... array, without point tuples.
+    
+    Works on array('f') as well as array('d'). Index lists are array('I') and
+    halves are split by rank, so memory stays a few bytes per point beyond the
+    coordinates. Returns ((i, j), dist, rows) with row indices i < j, where
+    rows holds both ends of every pair within dist + slack (the candidates a
+    float32 run must re-check in float64).
+    
+    Each row keeps the smallest distance it was offered at instead of a list
+    of pairs, so a grid full of ties costs 8 bytes per point. Points with
+    identical coordinates are grouped first: only the first of each group is
+    searched, with the pruning radius already down to slack, and every group
+    is a candidate as a whole.
+    """
+    n = len(coords) // 2
+    if n < 2:
+        return None, float('inf'), []
+    
+    xs = coords[0::2]
+    ys = coords[1::2]
+    # Stable sort by x after y gives the (x, y) order the rank split needs
+    py = array('I', sorted(range(n), key=ys.__getitem__))
+    px = array('I', sorted(py, key=xs.__getitem__))
+    
+    # Smallest squared distance each row was offered at; group leaders start at 0
+    marks = array('d', [float('inf')]) * n
+    follower = bytearray(n)
+    # [best d2, i, j, bound2]: bound2 = (dist + slack)**2 is the pruning radius
+    best = [float('inf'), -1, -1, float('inf')]
+    lead = px[0]
+    for b in px[1:]:
+        if xs[lead] == xs[b] and ys[lead] == ys[b]:
+            if not slack:
+                return (min(lead, b), max(lead, b)), 0.0, [min(lead, b), max(lead, b)]
+            follower[b] = 1
+            marks[lead] = 0.0
+            if best[1] < 0:
+                best = [0.0, min(lead, b), max(lead, b), slack * slack]
+        else:
+            lead = b
+    
+    leaders, leaders_y = px, py
+    if best[1] >= 0:
+        leaders = array('I', (i for i in px if not follower[i]))
+        leaders_y = array('I', (i for i in py if not follower[i]))
+    del py
+    
+    rank = array('I', bytes(4 * n))
+    for r, i in enumerate(leaders):
+        rank[i] = r
+    
+    closest_pair_compact_recursive(xs, ys, leaders, rank, 0, len(leaders), leaders_y, best, marks, slack, counters)
+    del leaders, leaders_y, rank
+    
+    d2, i, j, bound2 = best
+    rows = []
+    for r in px:
+        if not follower[r]:
+            lead = r
+        if marks[lead] <= bound2:
+            rows.append(r)
+    rows.sort()
+    return (min(i, j), max(i, j)), math.sqrt(d2), rows
+
+def closest_pair_compact_recursive(xs, ys, px, rank, lo, hi, py, best, marks, slack, counters=None, depth=0):
+    """Search px[lo:hi] (py: the same indices by y), updating best and marks in place"""
+    n = hi - lo
+    
+    if counters is not None:
+        counters['nodes'] += 1
+        if depth > counters['max_depth']:
+            counters['max_depth'] = depth
+    
+    def offer(c2, i, j):
+        if c2 < best[3]:
+            if c2 < marks[i]:
+                marks[i] = c2
+            if c2 < marks[j]:
+                marks[j] = c2
+            if c2 < best[0]:
+                best[:] = [c2, i, j, (math.sqrt(c2) + slack) ** 2 if slack else c2]
+    
+    if n <= 3:
+        if counters is not None:
+            counters['base_case_hits'] += 1
+            counters['distance_evals'] += n * (n - 1) // 2
+            counters['brute_force_evals'] += n * (n - 1) // 2
+        for a in range(lo, hi):
+            i = px[a]
+            for b in range(a + 1, hi):
+                j = px[b]
+                dx = xs[j] - xs[i]
+                dy = ys[j] - ys[i]
+                offer(dx * dx + dy * dy, i, j)
+        return
+    
+    split = lo + n // 2
+    mid_x = xs[px[split]]
+    
+    # Children's y lists are built one at a time so only one level's worth is alive
+    pyl = array('I', (i for i in py if rank[i] < split))
+    closest_pair_compact_recursive(xs, ys, px, rank, lo, split, pyl, best, marks, slack, counters, depth + 1)
+    del pyl
+    pyr = array('I', (i for i in py if rank[i] >= split))
+    closest_pair_compact_recursive(xs, ys, px, rank, split, hi, pyr, best, marks, slack, counters, depth + 1)
+    del pyr
+    
+    # best already holds the global minimum so far, which only narrows the strip
+    bound2 = best[3]
+    strip = array('I', (i for i in py if (xs[i] - mid_x) * (xs[i] - mid_x) < bound2))
+    for a in range(len(strip)):
+        i = strip[a]
+        xi, yi = xs[i], ys[i]
+        left = rank[i] < split
+        b = a + 1
+        while b < len(strip):
+            j = strip[b]
+            dy = ys[j] - yi
+            if dy * dy >= best[3]:
+                break
+            if (rank[j] < split) != left:
+                dx = xs[j] - xi
+                offer(dx * dx + dy * dy, i, j)
+            b += 1
+        
+        if counters is not None:
+            span = b - a - 1
+            counters['distance_evals'] += span
+            counters['strip_evals'] += span
+            if span > counters['max_strip_span']:
+                counters['max_strip_span'] = span
+
+def haversine(p1, p2):
+    """Great-circle distance in km between (longitude, latitude) points in degrees"""
+    lon1, lat1, lon2, lat2 = map(math.radians, (p1[0], p1[1], p2[0], p2[1]))
+    h = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+class CoordinateRangeError(ValueError):
+    """Points parsed fine but fall outside what the requested metric accepts"""
+
+def haversine_closest_pair(points, counters=None):
+    """Closest pair of (longitude, latitude) points by great-circle distance, in km.
+    
+    The first column is longitude in [-180, 180] and the second latitude in
+    [-90, 90], both in degrees; anything else raises CoordinateRangeError.
+    Points are projected onto the unit sphere, where chord length grows with
+    great-circle distance, so the 3-D Euclidean closest pair is the answer.
+    This also handles the antimeridian and poles, which a split on longitude
+    would not. The winning pair is then measured exactly with haversine.
+    """
+    coords = array('d')
+    for lon, lat in points:
+        if not (-180.0 <= lon <= 180.0 and -90.0 <= lat <= 90.0):
+            raise CoordinateRangeError(
+                f'haversine needs lon,lat columns with lon in [-180, 180] and lat in [-90, 90]; got ({lon}, {lat})')
+        lam, phi = math.radians(lon), math.radians(lat)
+        coords.extend((math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi)))
+    
+    pair, _ = closest_pair_nd(coords, 3, counters)
+    by_position = {tuple(coords[3 * i:3 * i + 3]): p for i, p in enumerate(points)}
+    p, q = by_position[pair[0]], by_position[pair[1]]
+    return (p, q), haversine(p, q)
+
+def k_closest_pairs(points, k, counters=None, metric='euclidean'):
+    """The k closest pairs as a sorted list of ((p, q), dist).
+    
+    Same divide and conquer as closest_pair_recursive, but every candidate goes
+    through a bounded max-heap of the k best pairs so far. The strip width is
+    the current k-th best distance, which only shrinks as the heap fills.
+    Points are tracked by index so duplicates are distinct points. Any planar
+    metric works, since none of them is shorter than |dx| or |dy|.
+    """
+    n = len(points)
+    if k <= 0 or n < 2:
+        return []
+    k = min(k, n * (n - 1) // 2)
+    measure = METRIC_DISTANCES[metric]
+    best = []  # max-heap of (-dist, i, j)
+    
+    def offer(i, j):
+        dist = measure(points[i], points[j])
+        if len(best) < k:
+            heapq.heappush(best, (-dist, i, j))
+        elif dist < -best[0][0]:
+            heapq.heapreplace(best, (-dist, i, j))
+    
+    def threshold():
+        return -best[0][0] if len(best) == k else float('inf')
+    
+    left_side = [False] * n
+    
+    def recurse(px, py, depth):
+        m = len(px)
+        if counters is not None:
+            counters['nodes'] += 1
+            if depth > counters['max_depth']:
+                counters['max_depth'] = depth
+        
+        if m <= 3:
+            if counters is not None:
+                counters['base_case_hits'] += 1
+                counters['distance_evals'] += m * (m - 1) // 2
+                counters['brute_force_evals'] += m * (m - 1) // 2
+            for a in range(m):
+                for b in range(a + 1, m):
+                    offer(px[a], px[b])
+            return
+        
+        mid = m // 2
+        mid_x = points[px[mid]][0]
+        for i in px[:mid]:
+            left_side[i] = True
+        for i in px[mid:]:
+            left_side[i] = False
+        pyl = [i for i in py if left_side[i]]
+        pyr = [i for i in py if not left_side[i]]
+        
+        recurse(px[:mid], pyl, depth + 1)
+        recurse(px[mid:], pyr, depth + 1)
+        
+        # Only pairs straddling the split are new here
+        for i in px[:mid]:
+            left_side[i] = True
+        for i in px[mid:]:
+            left_side[i] = False
+        d = threshold()
+        strip = [i for i in py if abs(points[i][0] - mid_x) < d]
+        for a in range(len(strip)):
+            pa = strip[a]
+            b = a + 1
+            while b < len(strip) and points[strip[b]][1] - points[pa][1] < threshold():
+                if left_side[pa] != left_side[strip[b]]:
+                    offer(pa, strip[b])
+                b += 1
+            
+            if counters is not None:
+                span = b - a - 1
+                counters['distance_evals'] += span
+                counters['strip_evals'] += span
+                if span > counters['max_strip_span']:
+                    counters['max_strip_span'] = span
+    
+    px = sorted(range(n), key=lambda i: points[i][0])
+    py = sorted(range(n), key=lambda i: points[i][1])
+    recurse(px, py, 0)
+    
+    return [((points[i], points[j]), -neg) for neg, i, j in sorted(best, key=lambda t: (-t[0], t[1], t[2]))]
+
+def closest_pair_nd(coords, dim, counters=None):
+    """Closest pair among n points in dim dimensions, stored flat in coords.
+    
+    Returns ((p, q), dist) with p and q as dim-tuples, like closest_pair_of_points.
+    """
+    n = len(coords) // dim
+    if n < 2:
+        return None, float('inf')
+    
+    # One index list per axis, sorted once and split stably at every level
+    by_axis = [sorted(range(n), key=lambda i, a=a: coords[i * dim + a]) for a in range(dim)]
+    (i, j), d = closest_pair_nd_recursive(coords, dim, by_axis, bytearray(n), counters)
+    return (tuple(coords[i * dim:(i + 1) * dim]), tuple(coords[j * dim:(j + 1) * dim])), d
+
+def closest_pair_nd_recursive(coords, dim, by_axis, left_side, counters=None, depth=0):
+    n = len(by_axis[0])
+    
+    if counters is not None:
+        counters['nodes'] += 1
+        if depth > counters['max_depth']:
+            counters['max_depth'] = depth
+    
+    if n <= 3:
+        if counters is not None:
+            counters['base_case_hits'] += 1
+            counters['distance_evals'] += n * (n - 1) // 2
+            counters['brute_force_evals'] += n * (n - 1) // 2
+        ids = by_axis[0]
+        pair, min_dist = None, float('inf')
+        for a in range(n):
+            for b in range(a + 1, n):
+                dist = math.dist(coords[ids[a] * dim:(ids[a] + 1) * dim], coords[ids[b] * dim:(ids[b] + 1) * dim])
+                if dist < min_dist:
+                    min_dist = dist
+                    pair = (ids[a], ids[b])
+        return pair, min_dist
+    
+    # Split the widest axis at its median; each list is already sorted so the extent is O(1)
+    axis = max(range(dim), key=lambda a: coords[by_axis[a][-1] * dim + a] - coords[by_axis[a][0] * dim + a])
+    order = by_axis[axis]
+    mid = n // 2
+    split = coords[order[mid] * dim + axis]
+    
+    for i in order[:mid]:
+        left_side[i] = 1
+    for i in order[mid:]:
+        left_side[i] = 0
+    left = [[i for i in ids if left_side[i]] for ids in by_axis]
+    right = [[i for i in ids if not left_side[i]] for ids in by_axis]
+    
+    pair_left, dl = closest_pair_nd_recursive(coords, dim, left, left_side, counters, depth + 1)
+    pair_right, dr = closest_pair_nd_recursive(coords, dim, right, left_side, counters, depth + 1)
+    
+    if dl < dr:
+        d = dl
+        min_pair = pair_left
+    else:
+        d = dr
+        min_pair = pair_right
+    if d == 0:
+        return min_pair, d
+    
+    # Slab of width d either side of the split, then a grid of d-sized cells over
+    # the right half of the slab; a left point can only match its neighbouring cells.
+    # Cells live in a trie keyed one axis at a time, so the 3**dim neighbourhood is
+    # only walked through cells that actually hold points.
+    slab_left = [i for i in left[axis] if split - coords[i * dim + axis] < d]
+    slab_right = [i for i in right[axis] if coords[i * dim + axis] - split < d]
+    if not slab_left or not slab_right:
+        return min_pair, d
+    
+    cell_size = d
+    cells = {}
+    for j in slab_right:
+        node = cells
+        for a in range(dim - 1):
+            node = node.setdefault(math.floor(coords[j * dim + a] / cell_size), {})
+        node.setdefault(math.floor(coords[j * dim + dim - 1] / cell_size), []).append(j)
+    
+    evals = 0
+    for i in slab_left:
+        point = coords[i * dim:(i + 1) * dim]
+        frontier = [cells]
+        for c in point:
+            k = math.floor(c / cell_size)
+            frontier = [child for node in frontier for child in (node.get(k - 1), node.get(k), node.get(k + 1)) if child]
+            if not frontier:
+                break
+        for members in frontier:
+            for j in members:
+                evals += 1
+                dist = math.dist(point, coords[j * dim:(j + 1) * dim])
+                if dist < d:
+                    d = dist
+                    min_pair = (i, j)
+    
+    if counters is not None:
+        counters['distance_evals'] += evals
+        counters['strip_evals'] += evals
+        if len(slab_left) + len(slab_right) > counters['max_strip_span']:
+            counters['max_strip_span'] = len(slab_left) + len(slab_right)
+    
+    return min_pair, d
+
+# Below this many points on the smaller side, scanning it against the other
+# side beats the recursion's sort and split
+BICHROMATIC_SCAN_MAX = 32
+
+def bichromatic_closest_pair(red, blue, counters=None):
+    """Closest (red, blue) pair across two point sets: ((r, b), dist).
+    
+    Same split and strip as closest_pair_recursive, but only pairs of
+    different colour are compared and single-colour halves return at once.
+    The recursion shares one global best, seeded from a random sample of each
+    colour, because a split that separates the colours has no finite answer
+    of its own to bound its strip with. A tiny set against a large one is
+    scanned directly instead.
+    """
+    if not red or not blue:
+        return None, float('inf')
+    if min(len(red), len(blue)) <= BICHROMATIC_SCAN_MAX:
+        return bichromatic_scan(red, blue, counters)
+    
+    points = list(red) + list(blue)
+    n_red = len(red)
+    px = sorted(range(len(points)), key=lambda i: points[i][0])
+    py = sorted(range(len(points)), key=lambda i: points[i][1])
+    
+    # Exact answer for a sample of each colour is a real cross pair, so an upper bound
+    sample_red = random.sample(range(n_red), min(n_red, 2 * math.isqrt(n_red)))
+    sample_blue = random.sample(range(n_red, len(points)), min(len(blue), 2 * math.isqrt(len(blue))))
+    best = [float('inf'), None]
+    for i in sample_red:
+        for j in sample_blue:
+            dist = distance(points[i], points[j])
+            if dist < best[0]:
+                best[:] = [dist, (i, j)]
+    # Tighten it by walking: nearest blue to the red end, then nearest red to that blue
+    i, j = best[1]
+    for _ in range(2):
+        dists = list(map(math.dist, repeat(points[i]), blue))
+        j = n_red + min(range(len(dists)), key=dists.__getitem__)
+        dists = list(map(math.dist, repeat(points[j]), red))
+        i = min(range(len(dists)), key=dists.__getitem__)
+        if dists[i] < best[0]:
+            best[:] = [dists[i], (i, j)]
+    if counters is not None:
+        evals = len(sample_red) * len(sample_blue) + 2 * len(points)
+        counters['distance_evals'] += evals
+        counters['brute_force_evals'] += evals
+    
+    bichromatic_recursive(points, n_red, px, py, best, counters)
+    dist, (i, j) = best
+    return (points[i], points[j]), dist
+
+def bichromatic_scan(red, blue, counters=None):
+    """Every red against every blue, with the inner loop in C; for a tiny side only"""
+    pair, min_dist = None, float('inf')
+    for r in red:
+        dists = list(map(math.dist, repeat(r), blue))
+        j = min(range(len(dists)), key=dists.__getitem__)
+        if dists[j] < min_dist:
+            min_dist = dists[j]
+            pair = (r, blue[j])
+    if counters is not None:
+        counters['distance_evals'] += len(red) * len(blue)
+        counters['brute_force_evals'] += len(red) * len(blue)
+    return pair, min_dist
+
+def bichromatic_recursive(points, n_red, px, py, best, counters=None, depth=0):
+    """Index-based recursion; indices below n_red are red. Updates best = [dist, (i, j)] in place"""
+    n = len(px)
+    
+    if counters is not None:
+        counters['nodes'] += 1
+        if depth > counters['max_depth']:
+            counters['max_depth'] = depth
+    
+    reds = sum(1 for i in px if i < n_red)
+    if reds == 0 or reds == n:
+        return
+    
+    if n <= 3:
+        if counters is not None:
+            counters['base_case_hits'] += 1
+        for a in range(n):
+            for b in range(a + 1, n):
+                if (px[a] < n_red) != (px[b] < n_red):
+                    dist = distance(points[px[a]], points[px[b]])
+                    if dist < best[0]:
+                        best[:] = [dist, (px[a], px[b]) if px[a] < n_red else (px[b], px[a])]
+                    if counters is not None:
+                        counters['distance_evals'] += 1
+                        counters['brute_force_evals'] += 1
+        return
+    
+    mid = n // 2
+    mid_x = points[px[mid]][0]
+    left = set(px[:mid])
+    
+    pyl = [i for i in py if i in left]
+    pyr = [i for i in py if i not in left]
+    
+    bichromatic_recursive(points, n_red, px[:mid], pyl, best, counters, depth + 1)
+    bichromatic_recursive(points, n_red, px[mid:], pyr, best, counters, depth + 1)
+    
+    # best is the global minimum so far, which only narrows the strip
+    strip = [i for i in py if abs(points[i][0] - mid_x) < best[0]]
+    for a in range(len(strip)):
+        i = strip[a]
+        b = a + 1
+        while b < len(strip) and (points[strip[b]][1] - points[i][1]) < best[0]:
+            j = strip[b]
+            if (i < n_red) != (j < n_red):
+                dist = distance(points[i], points[j])
+                if dist < best[0]:
+                    best[:] = [dist, (i, j) if i < n_red else (j, i)]
+            b += 1
+        
+        if counters is not None:
+            span = b - a - 1
+            counters['distance_evals'] += span
+            counters['strip_evals'] += span
+            if span > counters['max_strip_span']:
+                counters['max_strip_span'] = span
+
+def karatsuba(x, y, counters=None, depth=0):
+    if counters is not None:
+        counters['nodes'] += 1
+        counters['bigint_bytes'] += (x.bit_length() + 7) // 8 + (y.bit_length() + 7) // 8
+        if depth > counters['max_depth']:
+            counters['max_depth'] = depth
+    
+    if x < 10 or y < 10:
+        if counters is not None:
+            counters['base_case_hits'] += 1
+        return x * y
+    
+    n = max(len(str(x)), len(str(y)))
+    m = n // 2
+    
+    high1, low1 = divmod(x, 10**m)
+    high2, low2 = divmod(y, 10**m)
+    
+    z0 = karatsuba(low1, low2, counters, depth + 1)
+    z1 = karatsuba((low1 + high1), (low2 + high2), counters, depth + 1)
+    z2 = karatsuba(high1, high2, counters, depth + 1)
+    
+    return (z2 * 10**(2*m)) + ((z1 - z2 - z0) * 10**m) + z0
+
+# ============================================================================
+# OPERATION COUNTERS
+# ============================================================================
+
+def new_op_counters(algorithm):
+    """Fresh counter dict for one run, or None when counters are disabled"""
+    if not app.config['OP_COUNTERS']:
+        return None
+    if algorithm == 'closest_pair':
+        return {
+            'distance_evals': 0,
+            'brute_force_evals': 0,
+            'strip_evals': 0,
+            'max_strip_span': 0,
+            'max_depth': 0,
+            'nodes': 0,
+            'base_case_hits': 0
+        }
+    return {
+        'max_depth': 0,
+        'nodes': 0,
+        'base_case_hits': 0,
+        'bigint_bytes': 0
+    }
+
+# ============================================================================
+# DATASET GENERATION
+# ============================================================================
+
+def generate_points_dataset(num_points, min_coord=-1000, max_coord=1000, dim=2):
+    points = []
+    for _ in range(num_points):
+        points.append(tuple(random.uniform(min_coord, max_coord) for _ in range(dim)))
+    return points
+
+def generate_adversarial_dataset(kind, num_points, min_coord=-1000, max_coord=1000):
+    """Point sets that break an x-value split: shared x, lattices and heavy duplication"""
+    if kind == 'vertical_line':
+        x = random.uniform(min_coord, max_coord)
+        return [(x, y) for y in random.sample(range(min_coord * 100, max_coord * 100), num_points)]
+    if kind == 'collinear':
+        slope = random.uniform(-5, 5)
+        return [(x, slope * x) for x in (random.uniform(min_coord, max_coord) for _ in range(num_points))]
+    if kind == 'grid':
+        side = math.isqrt(num_points - 1) + 1
+        step = (max_coord - min_coord) / side
+        return [(min_coord + (i % side) * step, min_coord + (i // side) * step) for i in range(num_points)]
+    if kind == 'duplicates':
+        distinct = generate_points_dataset(max(1, num_points // 100), min_coord, max_coord)
+        return [random.choice(distinct) for _ in range(num_points)]
+    raise ValueError(f'Unknown adversarial dataset: {kind}')
+
+ADVERSARIAL_KINDS = ('vertical_line', 'collinear', 'grid', 'duplicates')
+
+def adversarial_scaling(sizes=(1000, 4000, 16000, 64000)):
+    """Distance evaluations per n log2 n on each adversarial input; flat rows mean O(n log n)"""
+    rows = []
+    for kind in ADVERSARIAL_KINDS:
+        for n in sizes:
+            points = generate_adversarial_dataset(kind, n)
+            counters = {'distance_evals': 0, 'brute_force_evals': 0, 'strip_evals': 0,
+                        'max_strip_span': 0, 'max_depth': 0, 'nodes': 0, 'base_case_hits': 0}
+            start_time = time.time()
+            closest_pair_of_points(points, counters)
+            rows.append({
+                'kind': kind,
+                'num_points': n,
+                'distance_evals': counters['distance_evals'],
+                'evals_per_nlogn': counters['distance_evals'] / (n * math.log2(n)),
+                'max_depth': counters['max_depth'],
+                'execution_time_ms': (time.time() - start_time) * 1000
+            })
+    return rows
+
+def generate_integer_dataset(num_digits_range):
+    num_digits = random.randint(num_digits_range[0], num_digits_range[1])
+    x = random.randint(10**(num_digits-1), 10**num_digits - 1)
+    y = random.randint(10**(num_digits-1), 10**num_digits - 1)
+    return x, y
+
+# ============================================================================
+# FILE PARSING
+# ============================================================================
+
+def parse_points_file(file_content):
+    lines = file_content.strip().split('\n')
+    n = int(lines[0])
+    points = []
+    for i in range(1, min(n + 1, len(lines))):
+        parts = lines[i].strip().split()
+        if len(parts) >= 2:
+            x, y = float(parts[0]), float(parts[1])
+            points.append((x, y))
+    return points
+
+def parse_labelled_points_file(file_content):
+    """Two labelled sets, one 'x y label' row per point: ((label_a, points_a), (label_b, points_b)).
+    
+    Labels are ordered by first appearance; a file with any other number of
+    labels, or a row without a label, is rejected.
+    """
+    lines = file_content.strip().split('\n')
+    n = int(lines[0])
+    sets = {}
+    for i in range(1, min(n + 1, len(lines))):
+        parts = lines[i].strip().split()
+        if not parts:
+            continue
+        if len(parts) != 3:
+            raise ValueError(f'Line {i + 1}: expected "x y label"')
+        sets.setdefault(parts[2], []).append((float(parts[0]), float(parts[1])))
+    if len(sets) != 2:
+        raise ValueError(f'Expected exactly 2 labels, found {len(sets)}')
+    return tuple(sets.items())
+
+def parse_integers_file(file_content):
+    lines = file_content.strip().split('\n')
+    x = int(lines[0].strip())
+    y = int(lines[1].strip())
+    return x, y
+
+def read_points_file(filepath):
+    return points_from_array(dataset_store.get(filepath, 'closest_pair')['data'])
+
+def read_integers_file(filepath):
+    return dataset_store.get(filepath, 'karatsuba')['data']
+
+@contextmanager
+def atomic_write(path, mode='w'):
+    """Write through a uniquely named temp file beside path, then rename it over path"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+# ============================================================================
+# DATASET STORE
+# ============================================================================
+
+def parse_points_array(text, typecode='d'):
+    """Parse a points file into a flat array of x0, y0, x1, y1, ... ('f' for float32)"""
+    dim, coords = parse_points_nd(text, typecode)
+    if dim != 2:
+        raise ValueError(f'Expected 2-D points, file has {dim} dimensions')
+    return coords
+
+def parse_points_exact(text):
+    """Parse a 2-D points file as scaled integers: (scale, flat array('q')).
+    
+    scale is 10**k for the most decimal places k in the file, so every
+    coordinate converts without rounding; the .6f files written here give 10**6.
+    Only the first n points are read, as in parse_points_file.
+    """
+    header, _, body = text.partition('\n')
+    fields = header.split()
+    n = int(fields[0])
+    if len(fields) > 1 and int(fields[1]) != 2:
+        raise ValueError(f'Expected 2-D points, file has {fields[1]} dimensions')
+    tokens = body.split()[:2 * n]
+    if len(tokens) % 2:
+        raise ValueError('Odd number of coordinates')
+    if any('e' in t or 'E' in t for t in tokens):
+        raise ValueError('Exponent notation cannot be read exactly')
+    
+    places = [len(t) - t.index('.') - 1 if '.' in t else 0 for t in tokens]
+    k = max(places, default=0)
+    try:
+        coords = array('q', (int(t.replace('.', '') + '0' * (k - p)) for t, p in zip(tokens, places)))
+    except OverflowError:
+        raise ValueError('Scaled coordinates do not fit in 64 bits')
+    return 10 ** k, coords
+
+def parse_points_nd(text, typecode='d'):
+    """Parse a points file with an 'n [d]' header (d defaults to 2) into (d, flat array).
+    
+    text may be str or bytes. float32 parses stream the body line by line, so
+    no full token list is built next to the compact array. Only the first n
+    points are read, as in parse_points_file.
+    """
+    header, _, body = text.partition(b'\n' if isinstance(text, bytes) else '\n')
+    fields = header.split()
+    n = int(fields[0])
+    dim = int(fields[1]) if len(fields) > 1 else 2
+    if typecode == 'f':
+        lines = io.BytesIO(body) if isinstance(body, bytes) else io.StringIO(body)
+        tokens = chain.from_iterable(line.split() for line in lines)
+    else:
+        tokens = body.split()
+    coords = array(typecode, map(float, islice(tokens, n * dim)))
+    if len(coords) % dim:
+        raise ValueError(f'Coordinate count is not a multiple of {dim}')
+    return dim, coords
+
+def point_typecode():
+    """float32 storage when COMPACT_FLOAT32 is set, else float64.
+    
+    Only callers that re-check their answer in float64 (closest_pair_compact
+    plus reverify_float64) or only draw the points should ask for this;
+    everything else loads the dataset store's float64 default.
+    """
+    return 'f' if app.config['COMPACT_FLOAT32'] else 'd'
+
+def points_from_array(coords):
+    return list(zip(coords[0::2], coords[1::2]))
+
+class DatasetStore:
+    """Process-wide cache of parsed datasets, invalidated by mtime/size and bounded by bytes.
+    
+    Point datasets are keyed by typecode too, so a float32 copy is never
+    handed to a caller that asked for float64.
+    """
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def _load(self, filepath, engine, file_stat, typecode='d'):
+        with timed('read'):
+            with open(filepath, 'rb') as f:
+                raw = f.read()
+        with timed('hash'):
+            sha256 = hashlib.sha256(raw).hexdigest()
+        with timed('parse'):
+            if engine == 'closest_pair':
+                data = parse_points_array(raw, typecode)
+                nbytes = data.itemsize * len(data)
+            elif engine == 'closest_pair_exact':
+                data = parse_points_exact(raw.decode('utf-8'))
+                nbytes = data[1].itemsize * len(data[1])
+            elif engine == 'closest_pair_nd':
+                data = parse_points_nd(raw, typecode)
+                nbytes = data[1].itemsize * len(data[1])
+            else:
+                lines = raw.decode('utf-8').split('\n')
+                data = (int(lines[0].strip()), int(lines[1].strip()))
+                nbytes = (data[0].bit_length() + data[1].bit_length()) // 8 + 2
+        return {
+            'engine': engine,
+            'sha256': sha256,
+            'mtime_ns': file_stat.st_mtime_ns,
+            'size': file_stat.st_size,
+            'data': data,
+            'typecode': typecode,
+            'nbytes': nbytes
+        }
+    
+    def get(self, filepath, engine, typecode='d'):
+        key = (os.path.abspath(filepath), engine, typecode)
+        file_stat = os.stat(filepath)
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if (entry is not None and entry['mtime_ns'] == file_stat.st_mtime_ns
+                    and entry['size'] == file_stat.st_size):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                record_cache('dataset_store', True)
+                return entry
+            self.misses += 1
+        record_cache('dataset_store', False)
+        
+        entry = self._load(filepath, engine, file_stat, typecode)
+        self._insert(key, entry)
+        return entry
+    
+    def _insert(self, key, entry):
+        if entry['nbytes'] > self.max_bytes:
+            return False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old['nbytes']
+            self._entries[key] = entry
+            self._bytes += entry['nbytes']
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted['nbytes']
+                self.evictions += 1
+        return True
+    
+    def preload(self, dataset_dir):
+        """Load every dataset until the budget is full; returns how many were loaded"""
+        loaded = 0
+        for engine, filename in list_batch_datasets(dataset_dir):
+            # Same entries the batch processors ask for
+            if engine == 'all_nearest':
+                engine, typecode = 'closest_pair', 'd'
+            else:
+                typecode = point_typecode() if engine == 'closest_pair' else 'd'
+            filepath = os.path.join(dataset_dir, filename)
+            key = (os.path.abspath(filepath), engine, typecode)
+            if key in self._entries:
+                continue
+            entry = self._load(filepath, engine, os.stat(filepath), typecode)
+            # Stop rather than evict datasets that were just preloaded
+            if self._bytes + entry['nbytes'] > self.max_bytes:
+                break
+            self._insert(key, entry)
+            loaded += 1
+        return loaded
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0
+            }
+
+dataset_store = DatasetStore(app.config['DATASET_STORE_BYTES'])
+
+# ============================================================================
+# DATASET LISTING
+# ============================================================================
+
+_listing = {'key': None, 'files': [], 'generation': 0}
+_listing_lock = threading.Lock()
+
+def invalidate_listing():
+    """Needed after rewriting files in place, which leaves the directory mtime unchanged"""
+    with _listing_lock:
+        _listing['key'] = None
+
+def dataset_listing(dataset_dir):
+    """Sorted dataset entries and a version tag, rescanned only when the directory changes"""
+    if not os.path.exists(dataset_dir):
+        return [], 'missing'
+    key = (os.path.abspath(dataset_dir), os.stat(dataset_dir).st_mtime_ns)
+    
+    with _listing_lock:
+        if _listing['key'] == key:
+            return _listing['files'], f"{key[1]}.{_listing['generation']}"
+    
+    files = []
+    with os.scandir(dataset_dir) as entries:
+        for entry in entries:
+            filename = entry.name
+            if not filename.endswith('.txt'):
+                continue
+            if filename.startswith('closest_pair_input_') or filename.startswith('integer_mult_input_'):
+                file_stat = entry.stat()
+                files.append({
+                    'name': filename,
+                    'type': 'closest_pair' if filename.startswith('closest_pair') else 'karatsuba',
+                    'size': file_stat.st_size,
+                    'timestamp': datetime.fromtimestamp(file_stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+                })
+            elif filename.startswith('closest_pair_nd_input_'):
+                file_stat = entry.stat()
+                with open(entry.path, 'rb') as f:
+                    fields = f.readline().split()
+                files.append({
+                    'name': filename,
+                    'type': 'closest_pair_nd',
+                    'dimensions': int(fields[1]) if len(fields) > 1 else 2,
+                    'size': file_stat.st_size,
+                    'timestamp': datetime.fromtimestamp(file_stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+                })
+    files.sort(key=lambda x: x['name'])
+    
+    with _listing_lock:
+        _listing['key'] = key
+        _listing['files'] = files
+        _listing['generation'] += 1
+        return files, f"{key[1]}.{_listing['generation']}"
+
+# ============================================================================
+# LEVEL OF DETAIL
+# ============================================================================
+
+def point_bounds(points):
+    """Bounding box and the four extreme points (min/max x, min/max y)"""
+    if not points:
+        return None, []
+    extremes = [min(points, key=itemgetter(0)), max(points, key=itemgetter(0)),
+                min(points, key=itemgetter(1)), max(points, key=itemgetter(1))]
+    bounds = {
+        'min_x': extremes[0][0],
+        'max_x': extremes[1][0],
+        'min_y': extremes[2][1],
+        'max_y': extremes[3][1]
+    }
+    return bounds, extremes
+
+def decimate_points(points, max_points, keep=()):
+    """Thin points to at most max_points with one point per grid cell.
+    
+    The points in keep (e.g. the closest pair) and the extremes on each axis
+    are always retained so the drawing shows the answer at the right scale.
+    """
+    if max_points <= 0 or len(points) <= max_points:
+        return points
+    
+    bounds, extremes = point_bounds(points)
+    keep = [tuple(p) for p in keep if p] + [tuple(p) for p in extremes]
+    budget = max(max_points - len(keep), 1)
+    side = max(1, math.isqrt(budget))
+    scale_x = side / ((bounds['max_x'] - bounds['min_x']) or 1.0)
+    scale_y = side / ((bounds['max_y'] - bounds['min_y']) or 1.0)
+    min_x, min_y = bounds['min_x'], bounds['min_y']
+    last = side - 1
+    
+    cells = {}
+    for x, y in points:
+        cell = min(int((x - min_x) * scale_x), last) * side + min(int((y - min_y) * scale_y), last)
+        if cell not in cells:
+            cells[cell] = (x, y)
+    
+    sampled = list(cells.values())
+    seen = set(sampled)
+    for p in keep:
+        if p not in seen:
+            sampled.append(p)
+            seen.add(p)
+    return sampled
+
+def decimate_rows(coords, max_points):
+    """Row indices to draw from a flat x, y array, chosen like decimate_points.
+    
+    Works on the array directly so a compact dataset never becomes a list of
+    tuples just to be thinned; the extreme rows on each axis are kept.
+    """
+    n = len(coords) // 2
+    if max_points <= 0 or n <= max_points:
+        return list(range(n))
+    
+    xs = coords[0::2]
+    ys = coords[1::2]
+    extremes = [min(range(n), key=xs.__getitem__), max(range(n), key=xs.__getitem__),
+                min(range(n), key=ys.__getitem__), max(range(n), key=ys.__getitem__)]
+    # Two more slots for the closest pair the caller adds
+    budget = max(max_points - len(extremes) - 2, 1)
+    side = max(1, math.isqrt(budget))
+    min_x, min_y = xs[extremes[0]], ys[extremes[2]]
+    scale_x = side / ((xs[extremes[1]] - min_x) or 1.0)
+    scale_y = side / ((ys[extremes[3]] - min_y) or 1.0)
+    last = side - 1
+    
+    cells = {}
+    for i, (x, y) in enumerate(zip(xs, ys)):
+        cell = min(int((x - min_x) * scale_x), last) * side + min(int((y - min_y) * scale_y), last)
+        if cell not in cells:
+            cells[cell] = i
+    return sorted(set(cells.values()).union(extremes))
+
+def lod_payload(payload, max_points):
+    if payload['type'] not in ('closest_pair', 'bichromatic'):
+        return payload
+    with timed('decimate'):
+        bounds = payload.get('bounds') or point_bounds(payload['points'])[0]
+        points = decimate_points(payload['points'], max_points, payload['closest_pair'] or ())
+    return dict(payload, points=points, bounds=bounds,
+                points_returned=len(points), decimated=len(points) < payload['num_points'])
+
+# ============================================================================
+# HEATMAP TILES
+# ============================================================================
+
+TILE_SIZE = 256
+# Points are bucketed once per dataset version by their tile at this zoom, so
+# a deeper tile only bins the points of its own bucket
+TILE_BUCKET_ZOOM = 6
+_tile_cache = OrderedDict()
+_tile_datasets = OrderedDict()
+_tile_lock = threading.Lock()
+
+def encode_png(width, height, rgba):
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+    stride = width * 4
+    raw = b''.join(b'\x00' + bytes(rgba[row * stride:(row + 1) * stride]) for row in range(height))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw, 6))
+            + chunk(b'IEND', b''))
+
+def tile_geometry(bounds, z, tx, ty):
+    """Origin (left, top) and pixels-per-unit of tile (tx, ty) at zoom z over the dataset bounds"""
+    tiles = 1 << z
+    # Pad slightly so points on the max edge land inside the last tile
+    width = ((bounds['max_x'] - bounds['min_x']) or 1.0) * (1 + 1e-9)
+    height = ((bounds['max_y'] - bounds['min_y']) or 1.0) * (1 + 1e-9)
+    left = bounds['min_x'] + tx * width / tiles
+    top = bounds['max_y'] - ty * height / tiles
+    return left, top, TILE_SIZE * tiles / width, TILE_SIZE * tiles / height
+
+def bin_tile(xs, ys, left, top, scale_x, scale_y):
+    """Count points per pixel with map/compress pipelines so the per-point work stays in C"""
+    cols = list(map(math.floor, map(mul, map(sub, xs, repeat(left)), repeat(scale_x))))
+    rows = list(map(math.floor, map(mul, map(sub, repeat(top), ys), repeat(scale_y))))
+    in_tile = range(TILE_SIZE).__contains__
+    inside = map(and_, map(in_tile, cols), map(in_tile, rows))
+    return Counter(compress(map(add, map(mul, rows, repeat(TILE_SIZE)), cols), inside))
+
+def render_tile(counts, pair_pixels):
+    rgba = bytearray(TILE_SIZE * TILE_SIZE * 4)
+    if counts:
+        log_max = math.log1p(max(counts.values()))
+        for index, count in counts.items():
+            level = math.log1p(count) / log_max if log_max else 1.0
+            # Blue (sparse) to yellow (dense)
+            rgba[index * 4:index * 4 + 4] = bytes((int(102 + 153 * level), int(126 + 129 * level),
+                                                   int(234 * (1 - level)), int(96 + 159 * level)))
+    for col, row in pair_pixels:
+        if 0 <= col < TILE_SIZE and 0 <= row < TILE_SIZE:
+            index = (row * TILE_SIZE + col) * 4
+            rgba[index:index + 4] = b'\xff\x44\x44\xff'
+    return encode_png(TILE_SIZE, TILE_SIZE, rgba)
+
+def pair_overlay_pixels(pair, left, top, scale_x, scale_y):
+    """Pixels of the closest-pair segment plus a 5x5 marker at each end"""
+    if not pair:
+        return []
+    (x0, y0), (x1, y1) = [(math.floor((p[0] - left) * scale_x), math.floor((top - p[1]) * scale_y)) for p in pair]
+    # Clamp the walk so a zoomed-in segment cannot produce millions of pixels
+    steps = min(max(abs(x1 - x0), abs(y1 - y0)), 4 * TILE_SIZE)
+    pixels = [(round(x0 + (x1 - x0) * i / steps), round(y0 + (y1 - y0) * i / steps)) for i in range(steps + 1)] if steps else []
+    for cx, cy in ((x0, y0), (x1, y1)):
+        pixels.extend((cx + dx, cy + dy) for dx in range(-2, 3) for dy in range(-2, 3))
+    return pixels
+
+def dataset_closest_pair(filepath, entry):
+    """Closest pair for a stored dataset; float32 entries are re-verified in float64"""
+    coords = entry['data']
+    with timed('compute'):
+        if entry['typecode'] == 'f':
+            _, _, rows = closest_pair_compact(coords, None, float32_slack(coords))
+            if not rows:
+                return None
+            with open(filepath) as f:
+                pair, _, _ = reverify_float64(rows, f)
+            return pair
+        pair, _ = closest_pair_of_points(points_from_array(coords))
+    return pair
+
+def dataset_bounds(coords):
+    xs = coords[0::2]
+    ys = coords[1::2]
+    if not xs:
+        return None
+    return {'min_x': min(xs), 'max_x': max(xs), 'min_y': min(ys), 'max_y': max(ys)}
+
+def tile_dataset(filepath, entry):
+    """Bounds, closest pair and bucketed points for one dataset version, built once.
+    
+    Points are sorted by the id (row * side + col) of their tile at
+    TILE_BUCKET_ZOOM, so one row of buckets is one contiguous slice of xs/ys
+    found by bisecting ids. Kept per content hash and precision, at most
+    TILE_DATASET_ENTRIES of them.
+    """
+    key = (entry['sha256'], entry['typecode'])
+    with _tile_lock:
+        tiles = _tile_datasets.get(key)
+        if tiles is not None:
+            _tile_datasets.move_to_end(key)
+            return tiles
+    
+    coords = entry['data']
+    bounds = dataset_bounds(coords)
+    tiles = {'bounds': bounds, 'pair': None, 'ids': array('I'), 'xs': coords[0::2], 'ys': coords[1::2]}
+    if bounds is not None:
+        with timed('bucket'):
+            xs, ys = tiles['xs'], tiles['ys']
+            last = (1 << TILE_BUCKET_ZOOM) - 1
+            left, top, scale_x, scale_y = tile_geometry(bounds, TILE_BUCKET_ZOOM, 0, 0)
+            cols = map(min, map(max, map(math.floor, map(mul, map(sub, xs, repeat(left)), repeat(scale_x / TILE_SIZE))), repeat(0)), repeat(last))
+            rows = map(min, map(max, map(math.floor, map(mul, map(sub, repeat(top), ys), repeat(scale_y / TILE_SIZE))), repeat(0)), repeat(last))
+            ids = list(map(add, map(mul, rows, repeat(last + 1)), cols))
+            order = sorted(range(len(ids)), key=ids.__getitem__)
+            tiles['ids'] = array('I', map(ids.__getitem__, order))
+            tiles['xs'] = array(xs.typecode, map(xs.__getitem__, order))
+            tiles['ys'] = array(ys.typecode, map(ys.__getitem__, order))
+        tiles['pair'] = dataset_closest_pair(filepath, entry)
+    
+    with _tile_lock:
+        _tile_datasets[key] = tiles
+        while len(_tile_datasets) > app.config['TILE_DATASET_ENTRIES']:
+            _tile_datasets.popitem(last=False)
+    return tiles
+
+def tile_points(tiles, z, tx, ty):
+    """xs and ys iterators over the buckets under tile (z, tx, ty), plus one bucket of margin"""
+    last = (1 << TILE_BUCKET_ZOOM) - 1
+    if z >= TILE_BUCKET_ZOOM:
+        c0 = c1 = tx >> (z - TILE_BUCKET_ZOOM)
+        r0 = r1 = ty >> (z - TILE_BUCKET_ZOOM)
+    else:
+        span = 1 << (TILE_BUCKET_ZOOM - z)
+        c0, c1 = tx * span, (tx + 1) * span - 1
+        r0, r1 = ty * span, (ty + 1) * span - 1
+    # Rounding can put an edge point in the neighbouring bucket; bin_tile drops the extras
+    c0, c1 = max(c0 - 1, 0), min(c1 + 1, last)
+    r0, r1 = max(r0 - 1, 0), min(r1 + 1, last)
+    
+    ids = tiles['ids']
+    slices = []
+    for row in range(r0, r1 + 1):
+        lo = bisect.bisect_left(ids, row * (last + 1) + c0)
+        hi = bisect.bisect_left(ids, row * (last + 1) + c1 + 1, lo)
+        if lo < hi:
+            slices.append((lo, hi))
+    xs = chain.from_iterable(tiles['xs'][lo:hi] for lo, hi in slices)
+    ys = chain.from_iterable(tiles['ys'][lo:hi] for lo, hi in slices)
+    return xs, ys
+
+def heatmap_tile(filepath, entry, z, tx, ty):
+    key = (entry['sha256'], entry['typecode'], z, tx, ty)
+    with _tile_lock:
+        png = _tile_cache.get(key)
+        if png is not None:
+            _tile_cache.move_to_end(key)
+    record_cache('heatmap_tiles', png is not None)
+    if png is not None:
+        return png
+    
+    tiles = tile_dataset(filepath, entry)
+    left, top, scale_x, scale_y = tile_geometry(tiles['bounds'], z, tx, ty)
+    with timed('bin'):
+        counts = bin_tile(*tile_points(tiles, z, tx, ty), left, top, scale_x, scale_y)
+    with timed('render'):
+        png = render_tile(counts, pair_overlay_pixels(tiles['pair'], left, top, scale_x, scale_y))
+    
+    with _tile_lock:
+        _tile_cache[key] = png
+        while len(_tile_cache) > app.config['TILE_CACHE_ENTRIES']:
+            _tile_cache.popitem(last=False)
+    return png
+
+# ============================================================================
+# SPATIAL INDEX
+# ============================================================================
+
+# File layout (little-endian): b'DKDT' | uint32 version | uint64 n |
+# uint64 source size | int64 source mtime_ns | 32-byte source sha256 |
+# uint32 bytes per coordinate the tree was built from | 4 pad bytes |
+# n*2 float64 coordinates in tree order | n int64 original row indices |
+# n*4 float64 bounding boxes (min x, max x, min y, max y) per subtree.
+# The tree is implicit: the node of range [lo, hi) is at (lo + hi) // 2 and
+# splits on (x, y) rank at even depths and (y, x) rank at odd depths.
+KDTREE_MAGIC = b'DKDT'
+KDTREE_VERSION = 3
+KDTREE_HEADER = struct.Struct('<4sIQQq32sI4x')
+KDTREE_SUFFIX = '.kdt'
+
+class KDTree:
+    """Static 2-D k-d tree over a dataset, loadable straight from an mmap"""
+    
+    def __init__(self, coords, ids, boxes, source=None, mm=None):
+        self.coords = coords
+        self.ids = ids
+        self.boxes = boxes
+        self.n = len(ids)
+        self.source = source
+        self._mm = mm
+    
+    @classmethod
+    def build(cls, coords):
+        xs = coords[0::2]
+        ys = coords[1::2]
+        n = len(xs)
+        # Ties are broken by the other coordinate, as in the rank split of
+        # closest_pair_recursive, so points sharing an x (or y) still end up
+        # in subtrees whose boxes do not overlap
+        ranks = []
+        for first, second in ((xs, ys), (ys, xs)):
+            rank = array('q', bytes(8 * n))
+            for r, i in enumerate(sorted(sorted(range(n), key=second.__getitem__), key=first.__getitem__)):
+                rank[i] = r
+            ranks.append(rank)
+        
+        order = list(range(n))
+        nodes = []
+        stack = [(0, n, 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if lo >= hi:
+                continue
+            nodes.append((lo, hi))
+            if hi - lo > 1:
+                order[lo:hi] = sorted(order[lo:hi], key=ranks[axis].__getitem__)
+            mid = (lo + hi) // 2
+            stack.append((lo, mid, axis ^ 1))
+            stack.append((mid + 1, hi, axis ^ 1))
+        del ranks
+        
+        tree_coords = array('d', bytes(16 * n))
+        tree_coords[0::2] = array('d', map(xs.__getitem__, order))
+        tree_coords[1::2] = array('d', map(ys.__getitem__, order))
+        
+        # Children are pushed after their parent, so walking backwards sees them first
+        boxes = array('d', bytes(32 * n))
+        for lo, hi in reversed(nodes):
+            mid = (lo + hi) // 2
+            x, y = tree_coords[2 * mid], tree_coords[2 * mid + 1]
+            box = [x, x, y, y]
+            for child in ((lo + mid) // 2 if lo < mid else -1, (mid + 1 + hi) // 2 if mid + 1 < hi else -1):
+                if child >= 0:
+                    c = 4 * child
+                    box[0] = min(box[0], boxes[c])
+                    box[1] = max(box[1], boxes[c + 1])
+                    box[2] = min(box[2], boxes[c + 2])
+                    box[3] = max(box[3], boxes[c + 3])
+            boxes[4 * mid:4 * mid + 4] = array('d', box)
+        return cls(tree_coords, array('q', order), boxes)
+    
+    def save(self, path, source):
+        coords = array('d', self.coords)
+        ids = array('q', self.ids)
+        boxes = array('d', self.boxes)
+        if sys.byteorder == 'big':
+            coords.byteswap()
+            ids.byteswap()
+            boxes.byteswap()
+        with atomic_write(path, 'wb') as f:
+            f.write(KDTREE_HEADER.pack(KDTREE_MAGIC, KDTREE_VERSION, self.n, source['size'],
+                                       source['mtime_ns'], bytes.fromhex(source['sha256']), source['itemsize']))
+            f.write(coords.tobytes())
+            f.write(ids.tobytes())
+            f.write(boxes.tobytes())
+    
+    @classmethod
+    def load(cls, path, accept=None):
+        """Map an index file, or None if it is foreign, truncated or rejected by accept(source).
+        
+        The header is read and checked before anything is mapped, so a stale
+        index never leaves an mmap behind.
+        """
+        with open(path, 'rb') as f:
+            header = f.read(KDTREE_HEADER.size)
+            if len(header) < KDTREE_HEADER.size:
+                return None
+            magic, version, n, size, mtime_ns, sha256, itemsize = KDTREE_HEADER.unpack(header)
+            if magic != KDTREE_MAGIC or version != KDTREE_VERSION:
+                return None
+            source = {'size': size, 'mtime_ns': mtime_ns, 'sha256': sha256.hex(), 'itemsize': itemsize}
+            if accept is not None and not accept(source):
+                return None
+            if os.fstat(f.fileno()).st_size != KDTREE_HEADER.size + 56 * n:
+                return None
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        start = KDTREE_HEADER.size
+        if sys.byteorder == 'big':
+            coords = array('d', mm[start:start + 16 * n])
+            ids = array('q', mm[start + 16 * n:start + 24 * n])
+            boxes = array('d', mm[start + 24 * n:start + 56 * n])
+            coords.byteswap()
+            ids.byteswap()
+            boxes.byteswap()
+            mm.close()
+            return cls(coords, ids, boxes, source)
+        view = memoryview(mm)
+        return cls(view[start:start + 16 * n].cast('d'), view[start + 16 * n:start + 24 * n].cast('q'),
+                   view[start + 24 * n:start + 56 * n].cast('d'), source, mm)
+    
+    def nearest(self, qx, qy, k=1):
+        """k nearest points as (distance, row index, (x, y)), closest first"""
+        coords = self.coords
+        boxes = self.boxes
+        heap = []  # max-heap of (-squared distance, position)
+        stack = [(0, self.n, 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if len(heap) == k:
+                # Distance from the query to this subtree's box; 0 inside it
+                b = 4 * mid
+                dx = max(boxes[b] - qx, 0.0, qx - boxes[b + 1])
+                dy = max(boxes[b + 2] - qy, 0.0, qy - boxes[b + 3])
+                if dx * dx + dy * dy >= -heap[0][0]:
+                    continue
+            px = coords[2 * mid]
+            py = coords[2 * mid + 1]
+            d2 = (px - qx) ** 2 + (py - qy) ** 2
+            if len(heap) < k:
+                heapq.heappush(heap, (-d2, mid))
+            elif d2 < -heap[0][0]:
+                heapq.heapreplace(heap, (-d2, mid))
+            
+            diff = (qx - px) if axis == 0 else (qy - py)
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            # Far side first so the near side is popped (and explored) next
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                stack.append((far[0], far[1], axis ^ 1))
+            stack.append((near[0], near[1], axis ^ 1))
+        
+        return [(math.sqrt(-d2), self.ids[pos], (coords[2 * pos], coords[2 * pos + 1]))
+                for d2, pos in sorted(heap, reverse=True)]
+    
+    def range_query(self, min_x, max_x, min_y, max_y, limit=None):
+        """Points inside the closed box as (row index, (x, y))"""
+        coords = self.coords
+        found = []
+        stack = [(0, self.n, 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            px = coords[2 * mid]
+            py = coords[2 * mid + 1]
+            if min_x <= px <= max_x and min_y <= py <= max_y:
+                found.append((self.ids[mid], (px, py)))
+                if limit and len(found) >= limit:
+                    break
+            value, low, high = (px, min_x, max_x) if axis == 0 else (py, min_y, max_y)
+            if low <= value:
+                stack.append((lo, mid, axis ^ 1))
+            if value <= high:
+                stack.append((mid + 1, hi, axis ^ 1))
+        return found
+
+_kdtrees = {}
+_kdtrees_lock = threading.Lock()
+
+def kdtree_for(filepath):
+    """Load (or build and save) the index next to a dataset, rebuilding if the dataset changed.
+    
+    Always built from float64 coordinates, so COMPACT_FLOAT32 never leaks
+    rounded points into the index or its answers.
+    """
+    file_stat = os.stat(filepath)
+    key = os.path.abspath(filepath)
+    
+    def current(source):
+        return (source['size'] == file_stat.st_size and source['mtime_ns'] == file_stat.st_mtime_ns
+                and source['itemsize'] == 8)
+    
+    with _kdtrees_lock:
+        tree = _kdtrees.get(key)
+    if tree is not None and current(tree.source):
+        return tree
+    
+    index_path = filepath + KDTREE_SUFFIX
+    tree = None
+    if os.path.exists(index_path):
+        with timed('read'):
+            tree = KDTree.load(index_path, current)
+    
+    if tree is None:
+        entry = dataset_store.get(filepath, 'closest_pair', 'd')
+        with timed('build'):
+            tree = KDTree.build(entry['data'])
+        source = {'size': entry['size'], 'mtime_ns': entry['mtime_ns'], 'sha256': entry['sha256'],
+                  'itemsize': entry['data'].itemsize}
+        tree.save(index_path, source)
+        tree.source = source
+    
+    with _kdtrees_lock:
+        _kdtrees[key] = tree
+    return tree
+
+def all_nearest_neighbours(coords):
+    """Nearest other point for every point: (array('q') indices, array('d') distances).
+    
+    Builds the k-d tree once (O(n log n)) and runs one 2-NN query per point,
+    skipping the point itself so exact duplicates get distance 0.
+    """
+    n = len(coords) // 2
+    indices = array('q', bytes(8 * n))
+    distances = array('d', bytes(8 * n))
+    if n < 2:
+        for i in range(n):
+            indices[i] = -1
+            distances[i] = float('inf')
+        return indices, distances
+    
+    tree = KDTree.build(coords)
+    for i in range(n):
+        for dist, j, _ in tree.nearest(coords[2 * i], coords[2 * i + 1], 2):
+            if j != i:
+                indices[i] = j
+                distances[i] = dist
+                break
+    return indices, distances
+
+def nearest_neighbour_summary(distances):
+    """Spacing statistics; outliers sit more than 3 standard deviations above the mean"""
+    finite = [d for d in distances if d != float('inf')]
+    if not finite:
+        return {'min': None, 'max': None, 'mean': None, 'std': None, 'outlier_count': 0}
+    mean = sum(finite) / len(finite)
+    std = math.sqrt(sum((d - mean) ** 2 for d in finite) / len(finite))
+    return {
+        'min': min(finite),
+        'max': max(finite),
+        'mean': mean,
+        'std': std,
+        'outlier_count': sum(1 for d in finite if d > mean + 3 * std)
+    }
+
+def radius_pairs(coords, r):
+    """Yield (i, j, dist) for every pair with dist < r, i < j.
+    
+    Points are bucketed into an r-sized grid, so each point is only compared
+    with its own cell and the forward half of its neighbours: O(n + output)
+    for bounded density. Pairs are produced lazily.
+    """
+    n = len(coords) // 2
+    if r <= 0 or n < 2:
+        return
+    r2 = r * r
+    cells = {}
+    for i in range(n):
+        cells.setdefault((math.floor(coords[2 * i] / r), math.floor(coords[2 * i + 1] / r)), []).append(i)
+    
+    for (cx, cy), members in cells.items():
+        # Own cell, then the 4 neighbours that sort after it, so each cell pair is visited once
+        for offset in range(len(members)):
+            i = members[offset]
+            xi, yi = coords[2 * i], coords[2 * i + 1]
+            for j in members[offset + 1:]:
+                dx = coords[2 * j] - xi
+                dy = coords[2 * j + 1] - yi
+                d2 = dx * dx + dy * dy
+                if d2 < r2:
+                    yield (i, j, math.sqrt(d2)) if i < j else (j, i, math.sqrt(d2))
+        for neighbour in ((cx + 1, cy - 1), (cx + 1, cy), (cx + 1, cy + 1), (cx, cy + 1)):
+            others = cells.get(neighbour)
+            if not others:
+                continue
+            for i in members:
+                xi, yi = coords[2 * i], coords[2 * i + 1]
+                for j in others:
+                    dx = coords[2 * j] - xi
+                    dy = coords[2 * j + 1] - yi
+                    d2 = dx * dx + dy * dy
+                    if d2 < r2:
+                        yield (i, j, math.sqrt(d2)) if i < j else (j, i, math.sqrt(d2))
+
+def count_radius_pairs(coords, r):
+    return sum(1 for _ in radius_pairs(coords, r))
+
+def approximate_closest_pair(coords, epsilon, sample_size=None):
+    """(1 + epsilon)-approximate closest pair with a certified lower bound: ((p, q), dist, lower_bound).
+    
+    The exact closest pair of a random sample (about 2 * sqrt(n) points) is a
+    real pair, so its distance U bounds the answer from above. One grid pass of
+    radius_pairs at r = U / (1 + epsilon) then either finds nothing, which
+    proves every pair is at least r apart, or finds the pairs closer than r,
+    whose minimum is the exact answer. Either way dist <= (1 + epsilon) * lower_bound.
+    """
+    n = len(coords) // 2
+    if n < 2:
+        return None, float('inf'), float('inf')
+    
+    m = sample_size or min(n, max(2, 2 * math.isqrt(n)))
+    sample = [(coords[2 * i], coords[2 * i + 1]) for i in random.sample(range(n), m)]
+    pair, upper = closest_pair_of_points(sample)
+    if upper == 0:
+        return pair, 0.0, 0.0
+    
+    r = upper / (1 + epsilon)
+    best = min(((d, i, j) for i, j, d in radius_pairs(coords, r)), default=None)
+    if best is None:
+        return pair, upper, r
+    d, i, j = best
+    return ((coords[2 * i], coords[2 * i + 1]), (coords[2 * j], coords[2 * j + 1])), d, d
+
+def float32_slack(coords):
+    """Upper bound on how far float32 rounding can move any pairwise distance, doubled"""
+    return 2 * max(map(abs, coords), default=0.0) * 2.0 ** -21
+
+def read_rows(rows, lines):
+    """Float64 (x, y) of the wanted data rows, re-read from the source lines (header first)"""
+    wanted = set(rows)
+    
+    exact = {}
+    row = -1
+    for line in lines:
+        fields = line.split()
+        if not fields:
+            continue
+        if row in wanted:
+            exact[row] = (float(fields[0]), float(fields[1]))
+            if len(exact) == len(wanted):
+                break
+        row += 1
+    return exact
+
+def reverify_float64(rows, lines):
+    """Pick the true closest pair among the candidate rows in float64.
+    
+    Only the candidate rows are re-read, so the full-precision data never has
+    to be held in memory. Every pair inside the candidate set is considered,
+    not just the ones float32 saw. Returns ((p, q), dist, (i, j)).
+    """
+    exact = read_rows(rows, lines)
+    
+    (p, q), dist = closest_pair_of_points(list(exact.values()))
+    by_point = {}
+    for r, point in exact.items():
+        by_point.setdefault(point, []).append(r)
+    i = by_point[p].pop()
+    j = by_point[q].pop()
+    return (p, q), dist, (min(i, j), max(i, j))
+
+# ============================================================================
+# BATCH PROCESSING
+# ============================================================================
+
+POINT_SIZES = [150, 200, 300, 500, 1000, 120, 180, 250, 400, 800]
+DIGIT_RANGES = [(120, 150), (150, 200), (200, 250), (300, 350), (400, 450),
+                (110, 130), (140, 160), (180, 220), (250, 300), (350, 400)]
+ND_POINT_SIZES = [200, 500, 1000]
+
+def generate_all_datasets(dataset_dir, progress=None):
+    generated_files = []
+    total = len(POINT_SIZES) + len(DIGIT_RANGES) + len(ND_POINT_SIZES) * len(app.config['ND_DIMENSIONS'])
+    
+    # Generate 10 closest pair datasets
+    for i, size in enumerate(POINT_SIZES, 1):
+        points = generate_points_dataset(size)
+        filename = f'closest_pair_input_{i}.txt'
+        filepath = os.path.join(dataset_dir, filename)
+        
+        with open(filepath, 'w') as f:
+            f.write(f"{len(points)}\n")
+            for point in points:
+                f.write(f"{point[0]:.6f} {point[1]:.6f}\n")
+        
+        file_stat = os.stat(filepath)
+        generated_files.append({
+            'name': filename,
+            'type': 'closest_pair',
+            'size': file_stat.st_size,
+            'points': size,
+            'timestamp': datetime.fromtimestamp(file_stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+        })
+        if progress:
+            progress(len(generated_files), total, filename)
+    
+    # Generate 10 karatsuba datasets
+    for i, digit_range in enumerate(DIGIT_RANGES, 1):
+        x, y = generate_integer_dataset(digit_range)
+        filename = f'integer_mult_input_{i}.txt'
+        filepath = os.path.join(dataset_dir, filename)
+        
+        with open(filepath, 'w') as f:
+            f.write(f"{x}\n{y}\n")
+        
+        file_stat = os.stat(filepath)
+        generated_files.append({
+            'name': filename,
+            'type': 'karatsuba',
+            'size': file_stat.st_size,
+            'digits': f"{len(str(x))}, {len(str(y))}",
+            'timestamp': datetime.fromtimestamp(file_stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+        })
+        if progress:
+            progress(len(generated_files), total, filename)
+    
+    # Higher-dimensional point sets, one series per configured dimension
+    for dim in app.config['ND_DIMENSIONS']:
+        for i, size in enumerate(ND_POINT_SIZES, 1):
+            points = generate_points_dataset(size, dim=dim)
+            filename = f'closest_pair_nd_input_{dim}d_{i}.txt'
+            filepath = os.path.join(dataset_dir, filename)
+            
+            with open(filepath, 'w') as f:
+                f.write(f"{len(points)} {dim}\n")
+                for point in points:
+                    f.write(' '.join(f"{c:.6f}" for c in point) + "\n")
+            
+            file_stat = os.stat(filepath)
+            generated_files.append({
+                'name': filename,
+                'type': 'closest_pair_nd',
+                'size': file_stat.st_size,
+                'points': size,
+                'dimensions': dim,
+                'timestamp': datetime.fromtimestamp(file_stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+            })
+            if progress:
+                progress(len(generated_files), total, filename)
+    
+    invalidate_listing()
+    return generated_files
+
+def process_closest_pair_file(dataset_dir, filename):
+    filepath = os.path.join(dataset_dir, filename)
+    if app.config['COMPACT_FLOAT32']:
+        return process_closest_pair_compact(filepath, filename)
+    points = read_points_file(filepath)
+    
+    with timed('compute'):
+        counters = new_op_counters('closest_pair')
+        start_time = time.time()
+        pair, min_dist = closest_pair_of_points(points, counters)
+        end_time = time.time()
+    
+    execution_time = (end_time - start_time) * 1000
+    
+    return {
+        'filename': filename,
+        'type': 'closest_pair',
+        'num_points': len(points),
+        'distance': min_dist,
+        'execution_time_ms': execution_time,
+        'counters': counters,
+        'status': 'success'
+    }
+
+def process_closest_pair_compact(filepath, filename):
+    coords = dataset_store.get(filepath, 'closest_pair', 'f')['data']
+    
+    with timed('compute'):
+        counters = new_op_counters('closest_pair')
+        start_time = time.time()
+        _, min_dist, rows = closest_pair_compact(coords, counters, float32_slack(coords))
+        end_time = time.time()
+    with timed('verify'):
+        if rows:
+            with open(filepath) as f:
+                _, min_dist, _ = reverify_float64(rows, f)
+    
+    execution_time = (end_time - start_time) * 1000
+    
+    return {
+        'filename': filename,
+        'type': 'closest_pair',
+        'num_points': len(coords) // 2,
+        'distance': min_dist,
+        'compact': True,
+        'execution_time_ms': execution_time,
+        'counters': counters,
+        'status': 'success'
+    }
+
+def process_closest_pair_nd_file(dataset_dir, filename):
+    filepath = os.path.join(dataset_dir, filename)
+    dim, coords = dataset_store.get(filepath, 'closest_pair_nd')['data']
+    
+    with timed('compute'):
+        counters = new_op_counters('closest_pair')
+        start_time = time.time()
+        pair, min_dist = closest_pair_nd(coords, dim, counters)
+        end_time = time.time()
+    
+    execution_time = (end_time - start_time) * 1000
+    
+    return {
+        'filename': filename,
+        'type': 'closest_pair_nd',
+        'num_points': len(coords) // dim,
+        'dimensions': dim,
+        'distance': min_dist,
+        'execution_time_ms': execution_time,
+        'counters': counters,
+        'status': 'success'
+    }
+
+def process_karatsuba_file(dataset_dir, filename):
+    filepath = os.path.join(dataset_dir, filename)
+    x, y = read_integers_file(filepath)
+    
+    with timed('compute'):
+        counters = new_op_counters('karatsuba')
+        start_time = time.time()
+        result = karatsuba(x, y, counters)
+        end_time = time.time()
+    
+    execution_time = (end_time - start_time) * 1000
+    with timed('verify'):
+        expected = x * y
+        verified = (result == expected)
+    
+    return {
+        'filename': filename,
+        'type': 'karatsuba',
+        'x_digits': exact_decimal_digits(x),
+        'y_digits': exact_decimal_digits(y),
+        'result_digits': exact_decimal_digits(result),
+        'verified': verified,
+        'execution_time_ms': execution_time,
+        'counters': counters,
+        'status': 'success' if verified else 'failed'
+    }
+
+def process_all_nearest_file(dataset_dir, filename):
+    filepath = os.path.join(dataset_dir, filename)
+    coords = dataset_store.get(filepath, 'closest_pair')['data']
+    
+    with timed('compute'):
+        start_time = time.time()
+        indices, distances = all_nearest_neighbours(coords)
+        end_time = time.time()
+    
+    execution_time = (end_time - start_time) * 1000
+    
+    # Compact arrays beside the dataset: int64 indices then float64 distances
+    output = filepath + ALL_NEAREST_SUFFIX
+    write_all_nearest(output, indices, distances)
+    
+    return {
+        'filename': filename,
+        'type': 'all_nearest',
+        'num_points': len(indices),
+        'output': os.path.basename(output),
+        'summary': nearest_neighbour_summary(distances),
+        'execution_time_ms': execution_time,
+        'status': 'success'
+    }
+
+def write_all_nearest(path, indices, distances):
+    indices = array('q', indices)
+    distances = array('d', distances)
+    if sys.byteorder == 'big':
+        indices.byteswap()
+        distances.byteswap()
+    with atomic_write(path, 'wb') as f:
+        f.write(indices.tobytes())
+        f.write(distances.tobytes())
+
+BATCH_PROCESSORS = {
+    'closest_pair': process_closest_pair_file,
+    'karatsuba': process_karatsuba_file,
+    'all_nearest': process_all_nearest_file,
+    'closest_pair_nd': process_closest_pair_nd_file
+}
+
+# Bump when an engine's output changes so cached manifest results are recomputed
+ENGINE_VERSIONS = {
+    'closest_pair': 1,
+    'karatsuba': 2,
+    'all_nearest': 1,
+    'bichromatic': 1,
+    'closest_pair_nd': 1,
+    'closest_pair_exact': 1,
+    'closest_pair_approx': 1
+}
+
+MANIFEST_FILE = 'manifest.json'
+
+_dataset_dir_locks = {}
+_dataset_dir_locks_lock = threading.Lock()
+
+def dataset_dir_lock(dataset_dir):
+    """One lock per dataset directory; every generate or apply run holds it throughout"""
+    key = os.path.abspath(dataset_dir)
+    with _dataset_dir_locks_lock:
+        return _dataset_dir_locks.setdefault(key, threading.Lock())
+MANIFEST_VERSION = 2
+ALL_NEAREST_SUFFIX = '.ann'
+
+def list_batch_datasets(dataset_dir):
+    """(engine, filename) pairs in report order"""
+    names = os.listdir(dataset_dir)
+    closest_files = sorted([f for f in names if f.startswith('closest_pair_input_') and f.endswith('.txt')])
+    karatsuba_files = sorted([f for f in names if f.startswith('integer_mult_input_') and f.endswith('.txt')])
+    nd_files = sorted([f for f in names if f.startswith('closest_pair_nd_input_') and f.endswith('.txt')])
+    tasks = ([('closest_pair', f) for f in closest_files] +
+             [('karatsuba', f) for f in karatsuba_files] +
+             [('closest_pair_nd', f) for f in nd_files])
+    if app.config['BATCH_ALL_NEAREST']:
+        tasks += [('all_nearest', f) for f in closest_files]
+    return tasks
+
+def compute_statistics(results):
+    closest_results = [r for r in results if r['type'] == 'closest_pair']
+    karatsuba_results = [r for r in results if r['type'] == 'karatsuba']
+    all_nearest_results = [r for r in results if r['type'] == 'all_nearest']
+    nd_results = [r for r in results if r['type'] == 'closest_pair_nd']
+    
+    stats = {
+        'closest_pair': {
+            'total': len(closest_results),
+            'avg_time': sum(r['execution_time_ms'] for r in closest_results) / len(closest_results) if closest_results else 0,
+            'min_time': min(r['execution_time_ms'] for r in closest_results) if closest_results else 0,
+            'max_time': max(r['execution_time_ms'] for r in closest_results) if closest_results else 0
+        },
+        'karatsuba': {
+            'total': len(karatsuba_results),
+            'avg_time': sum(r['execution_time_ms'] for r in karatsuba_results) / len(karatsuba_results) if karatsuba_results else 0,
+            'min_time': min(r['execution_time_ms'] for r in karatsuba_results) if karatsuba_results else 0,
+            'max_time': max(r['execution_time_ms'] for r in karatsuba_results) if karatsuba_results else 0,
+            'all_verified': all(r['verified'] for r in karatsuba_results)
+        }
+    }
+    if all_nearest_results:
+        stats['all_nearest'] = {
+            'total': len(all_nearest_results),
+            'avg_time': sum(r['execution_time_ms'] for r in all_nearest_results) / len(all_nearest_results),
+            'min_time': min(r['execution_time_ms'] for r in all_nearest_results),
+            'max_time': max(r['execution_time_ms'] for r in all_nearest_results)
+        }
+    if nd_results:
+        stats['closest_pair_nd'] = {
+            'total': len(nd_results),
+            'dimensions': sorted({r['dimensions'] for r in nd_results}),
+            'avg_time': sum(r['execution_time_ms'] for r in nd_results) / len(nd_results),
+            'min_time': min(r['execution_time_ms'] for r in nd_results),
+            'max_time': max(r['execution_time_ms'] for r in nd_results)
+        }
+    return stats
+
+def write_result_reports(dataset_dir, results):
+    closest_results = [r for r in results if r['type'] == 'closest_pair']
+    karatsuba_results = [r for r in results if r['type'] == 'karatsuba']
+    
+    with atomic_write(os.path.join(dataset_dir, 'closest_pair_results.txt')) as f:
+        f.write("CLOSEST PAIR OF POINTS - RESULTS\n")
+        f.write("="*80 + "\n\n")
+        for r in closest_results:
+            f.write(f"Dataset: {r['filename']}\n")
+            f.write(f"Number of points: {r['num_points']}\n")
+            f.write(f"Distance: {r['distance']:.6f}\n")
+            f.write(f"Execution time: {r['execution_time_ms']:.4f} ms\n")
+            f.write("-"*80 + "\n\n")
+    
+    with atomic_write(os.path.join(dataset_dir, 'integer_mult_results.txt')) as f:
+        f.write("KARATSUBA INTEGER MULTIPLICATION - RESULTS\n")
+        f.write("="*80 + "\n\n")
+        for r in karatsuba_results:
+            f.write(f"Dataset: {r['filename']}\n")
+            f.write(f"First integer digits: {r['x_digits']}\n")
+            f.write(f"Second integer digits: {r['y_digits']}\n")
+            f.write(f"Result digits: {r['result_digits']}\n")
+            f.write(f"Verification: {'PASSED' if r['verified'] else 'FAILED'}\n")
+            f.write(f"Execution time: {r['execution_time_ms']:.4f} ms\n")
+            f.write("-"*80 + "\n\n")
+
+def record_batch_result(r):
+    if r['type'] == 'karatsuba':
+        record_engine_run('karatsuba', r['execution_time_ms'], max(r['x_digits'], r['y_digits']))
+    else:
+        record_engine_run(r['type'], r['execution_time_ms'], r['num_points'])
+
+def file_sha256(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(dataset_dir):
+    try:
+        with open(os.path.join(dataset_dir, MANIFEST_FILE), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('files', {})
+
+def save_manifest(dataset_dir, entries):
+    with atomic_write(os.path.join(dataset_dir, MANIFEST_FILE)) as f:
+        json.dump({'version': MANIFEST_VERSION, 'files': entries}, f)
+
+def manifest_entry(dataset_dir, filename, engine, previous):
+    """Fingerprint a dataset, reusing the previous hash when size and mtime are unchanged"""
+    file_stat = os.stat(os.path.join(dataset_dir, filename))
+    if (previous and previous['size'] == file_stat.st_size
+            and previous['mtime_ns'] == file_stat.st_mtime_ns):
+        sha256 = previous['sha256']
+    else:
+        sha256 = file_sha256(os.path.join(dataset_dir, filename))
+    return {
+        'sha256': sha256,
+        'size': file_stat.st_size,
+        'mtime_ns': file_stat.st_mtime_ns,
+        'engine': engine,
+        'engine_version': ENGINE_VERSIONS[engine],
+        'result': None
+    }
+
+# Settings the batch processors read at call time. Workers started with the
+# 'spawn' method (macOS, Windows) re-import this module with the defaults, so
+# the pool initializer copies the running values in.
+BATCH_WORKER_CONFIG = ('COMPACT_FLOAT32', 'OP_COUNTERS', 'DATASET_STORE_BYTES')
+
+def init_batch_worker(config):
+    app.config.update(config)
+    dataset_store.max_bytes = app.config['DATASET_STORE_BYTES']
+
+def apply_all_algorithms(dataset_dir, progress=None, jobs=None, force=False):
+    tasks = list_batch_datasets(dataset_dir)
+    jobs = app.config['APPLY_JOBS'] if jobs is None else jobs
+    incremental = app.config['INCREMENTAL_APPLY'] and not force
+    previous = load_manifest(dataset_dir) if incremental else {}
+    entries = {}
+    results = [None] * len(tasks)
+    done = 0
+    
+    # Re-emit cached results for datasets whose content and engine are unchanged
+    for i, (engine, filename) in enumerate(tasks):
+        old = previous.get(f'{engine}/{filename}')
+        entry = entries[f'{engine}/{filename}'] = manifest_entry(dataset_dir, filename, engine, old)
+        if (old and old.get('result') is not None and old['sha256'] == entry['sha256']
+                and old['engine_version'] == ENGINE_VERSIONS[engine]):
+            results[i] = dict(old['result'], cached=True)
+            entry['result'] = old['result']
+            done += 1
+            if progress:
+                progress(done, len(tasks), filename)
+    
+    pending = [i for i in range(len(tasks)) if results[i] is None]
+    
+    def finish(i):
+        nonlocal done
+        engine, filename = tasks[i]
+        record_batch_result(results[i])
+        entries[f'{engine}/{filename}']['result'] = results[i]
+        done += 1
+        if progress:
+            progress(done, len(tasks), filename)
+    
+    try:
+        if jobs > 1 and len(pending) > 1:
+            # Largest files first so the longest datasets don't start last
+            pending.sort(key=lambda i: entries[f'{tasks[i][0]}/{tasks[i][1]}']['size'], reverse=True)
+            pool = ProcessPoolExecutor(max_workers=jobs, initializer=init_batch_worker,
+                                       initargs=({name: app.config[name] for name in BATCH_WORKER_CONFIG},))
+            try:
+                with timed('compute'):
+                    futures = {pool.submit(BATCH_PROCESSORS[tasks[i][0]], dataset_dir, tasks[i][1]): i for i in pending}
+                    for future in as_completed(futures):
+                        i = futures[future]
+                        results[i] = future.result()
+                        finish(i)
+            finally:
+                pool.shutdown(cancel_futures=True)
+        else:
+            for i in pending:
+                engine, filename = tasks[i]
+                results[i] = BATCH_PROCESSORS[engine](dataset_dir, filename)
+                finish(i)
+    finally:
+        # Keep whatever finished, even if the batch was cancelled part way
+        if app.config['INCREMENTAL_APPLY']:
+            save_manifest(dataset_dir, {name: e for name, e in entries.items() if e['result'] is not None})
+    
+    stats = compute_statistics(results)
+    write_result_reports(dataset_dir, results)
+    return results, stats
+
+# ============================================================================
+# REQUEST PROFILING
+# ============================================================================
+
+class StackSampler:
+    """Samples one thread's Python stack and aggregates collapsed stacks"""
+    
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+    
+    def collapsed(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+_slow_profiles = []
+_slow_profiles_lock = threading.Lock()
+
+def profiling_requested():
+    if not app.config['PROFILING_ENABLED']:
+        return None
+    mode = request.args.get('profile') or request.headers.get('X-Profile')
+    if not mode or mode == '0':
+        return None
+    return 'cprofile' if mode == 'cprofile' else 'sample'
+
+def store_profile(endpoint, duration_ms, mode, payload):
+    """Keep only the PROFILE_KEEP slowest profiles on disk"""
+    profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    extension = 'prof' if mode == 'cprofile' else 'folded'
+    path = os.path.join(app.config['PROFILE_FOLDER'], f'{profile_id}.{extension}')
+    entry = {
+        'id': profile_id,
+        'endpoint': endpoint,
+        'mode': mode,
+        'duration_ms': duration_ms,
+        'file': os.path.basename(path)
+    }
+    
+    with _slow_profiles_lock:
+        if len(_slow_profiles) >= app.config['PROFILE_KEEP'] and duration_ms <= _slow_profiles[-1]['duration_ms']:
+            return None
+        os.makedirs(app.config['PROFILE_FOLDER'], exist_ok=True)
+        if mode == 'cprofile':
+            payload.dump_stats(path)
+        else:
+            with open(path, 'w') as f:
+                f.write(payload)
+        _slow_profiles.append(entry)
+        _slow_profiles.sort(key=lambda p: p['duration_ms'], reverse=True)
+        while len(_slow_profiles) > app.config['PROFILE_KEEP']:
+            evicted = _slow_profiles.pop()
+            try:
+                os.remove(os.path.join(app.config['PROFILE_FOLDER'], evicted['file']))
+            except OSError:
+                pass
+    
+    return profile_id
+
+def profiled(view):
+    """Profile the wrapped route when requested via ?profile= or X-Profile"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        mode = profiling_requested()
+        if mode is None:
+            return view(*args, **kwargs)
+        
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            start_time = time.time()
+            profiler.enable()
+            try:
+                rv = view(*args, **kwargs)
+            finally:
+                profiler.disable()
+            payload = profiler
+        else:
+            sampler = StackSampler(threading.get_ident(), app.config['PROFILE_INTERVAL'])
+            start_time = time.time()
+            sampler.start()
+            try:
+                rv = view(*args, **kwargs)
+            finally:
+                sampler.stop()
+            payload = sampler.collapsed()
+        
+        duration_ms = (time.time() - start_time) * 1000
+        response = make_response(rv)
+        profile_id = store_profile(request.endpoint, duration_ms, mode, payload)
+        response.headers['X-Profile-Duration'] = f'{duration_ms:.3f}'
+        if profile_id:
+            response.headers['X-Profile-Id'] = profile_id
+        return response
+    
+    return wrapper
+
+# ============================================================================
+# REQUEST TIMING
+# ============================================================================
+
+@contextmanager
+def timed(phase):
+    """Accumulate wall time for a request phase; no-op outside a request"""
+    if not has_request_context():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = g.setdefault('timings', {})
+        timings[phase] = timings.get(phase, 0.0) + (time.perf_counter() - start) * 1000
+
+def timed_jsonify(payload):
+    payload['timings'] = {phase: round(ms, 3) for phase, ms in g.get('timings', {}).items()}
+    with timed('serialize'):
+        return jsonify(payload)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.timings = {}
+
+@app.after_request
+def add_server_timing(response):
+    spans = [f"{phase};dur={ms:.3f}" for phase, ms in g.get('timings', {}).items()]
+    if 'request_start' in g:
+        spans.append(f"total;dur={(time.perf_counter() - g.request_start) * 1000:.3f}")
+    if spans:
+        response.headers['Server-Timing'] = ', '.join(spans)
+    return response
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+POINTS_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000, 10000000)
+DIGITS_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000)
+
+METRIC_HELP = {
+    'daa_http_requests_total': ('counter', 'HTTP requests by route, method and status'),
+    'daa_http_request_duration_ms': ('histogram', 'HTTP request latency in milliseconds'),
+    'daa_http_requests_in_flight': ('gauge', 'HTTP requests currently being served'),
+    'daa_engine_runs_total': ('counter', 'Algorithm engine invocations'),
+    'daa_engine_duration_ms': ('histogram', 'Algorithm engine compute time in milliseconds'),
+    'daa_input_points': ('histogram', 'Closest pair input sizes in points'),
+    'daa_input_digits': ('histogram', 'Karatsuba operand sizes in decimal digits'),
+    'daa_cache_hits_total': ('counter', 'Cache hits by cache'),
+    'daa_cache_misses_total': ('counter', 'Cache misses by cache'),
+    'daa_cache_hit_ratio': ('gauge', 'Cache hit ratio by cache')
+}
+
+class MetricsRegistry:
+    """In-process metrics with one shard per thread so updates take no lock.
+    
+    The threaded dev server starts a thread per request, so shards of threads
+    that have finished are folded into a retired total whenever a new thread
+    registers; the shard list stays as long as the live thread count.
+    """
+    
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []  # (thread, shard)
+        self._retired = ({}, {})
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _merge(into, shard):
+        values, histograms = into
+        for key, value in dict(shard[0]).items():
+            values[key] = values.get(key, 0) + value
+        for key, (buckets, counts, total) in dict(shard[1]).items():
+            merged = histograms.setdefault(key, [buckets, [0] * len(counts), 0.0])
+            for i, count in enumerate(list(counts)):
+                merged[1][i] += count
+            merged[2] += total
+    
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = ({}, {})
+            with self._lock:
+                live = []
+                for thread, old in self._shards:
+                    if thread.is_alive():
+                        live.append((thread, old))
+                    else:
+                        # A finished thread can no longer write to its shard
+                        self._merge(self._retired, old)
+                live.append((threading.current_thread(), shard))
+                self._shards = live
+            self._local.shard = shard
+        return shard
+    
+    def inc(self, name, labels=(), value=1):
+        values = self._shard()[0]
+        key = (name, labels)
+        values[key] = values.get(key, 0) + value
+    
+    def observe(self, name, value, buckets, labels=()):
+        histograms = self._shard()[1]
+        key = (name, labels)
+        hist = histograms.get(key)
+        if hist is None:
+            hist = histograms[key] = [buckets, [0] * (len(buckets) + 1), 0.0]
+        hist[1][bisect.bisect_left(buckets, value)] += 1
+        hist[2] += value
+    
+    def snapshot(self):
+        totals = ({}, {})
+        with self._lock:
+            self._merge(totals, self._retired)
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            self._merge(totals, shard)
+        return totals
+
+metrics = MetricsRegistry()
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+def render_metrics():
+    values, histograms = metrics.snapshot()
+    
+    hits = {}
+    misses = {}
+    for (name, labels), value in values.items():
+        if name == 'daa_cache_hits_total':
+            hits[labels] = value
+        elif name == 'daa_cache_misses_total':
+            misses[labels] = value
+    for labels in set(hits) | set(misses):
+        lookups = hits.get(labels, 0) + misses.get(labels, 0)
+        values[('daa_cache_hit_ratio', labels)] = hits.get(labels, 0) / lookups if lookups else 0
+    
+    lines = []
+    for name, (metric_type, help_text) in METRIC_HELP.items():
+        series = sorted((labels, v) for (n, labels), v in values.items() if n == name)
+        hist_series = sorted((labels, h) for (n, labels), h in histograms.items() if n == name)
+        if not series and not hist_series:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for labels, value in series:
+            lines.append(f'{name}{format_labels(labels)} {value}')
+        for labels, (buckets, counts, total) in hist_series:
+            cumulative = 0
+            for bound, count in zip(buckets, counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{format_labels(labels + (("le", bound),))} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{name}_bucket{format_labels(labels + (("le", "+Inf"),))} {cumulative}')
+            lines.append(f'{name}_sum{format_labels(labels)} {total}')
+            lines.append(f'{name}_count{format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+def record_engine_run(engine, execution_time, size):
+    labels = (('engine', engine),)
+    metrics.inc('daa_engine_runs_total', labels)
+    metrics.observe('daa_engine_duration_ms', execution_time, LATENCY_BUCKETS_MS, labels)
+    if engine == 'karatsuba':
+        metrics.observe('daa_input_digits', size, DIGITS_BUCKETS, labels)
+    else:
+        metrics.observe('daa_input_points', size, POINTS_BUCKETS, labels)
+
+def record_cache(cache, hit):
+    metrics.inc('daa_cache_hits_total' if hit else 'daa_cache_misses_total', (('cache', cache),))
+
+def decimal_digits(n):
+    """Cheap digit count that avoids str() on large integers"""
+    return max(1, int(abs(n).bit_length() * 0.30102999566398120) + 1)
+
+def exact_decimal_digits(n):
+    """Exact digit count without str(): decimal_digits is never low and at most one high"""
+    digits = decimal_digits(n)
+    return digits - 1 if digits > 1 and abs(n) < 10 ** (digits - 1) else digits
+
+@app.before_request
+def track_in_flight():
+    g.in_flight = True
+    metrics.inc('daa_http_requests_in_flight')
+
+@app.after_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.inc('daa_http_requests_total', (('route', route), ('method', request.method), ('status', str(response.status_code))))
+    if 'request_start' in g:
+        elapsed = (time.perf_counter() - g.request_start) * 1000
+        metrics.observe('daa_http_request_duration_ms', elapsed, LATENCY_BUCKETS_MS, (('route', route),))
+    return response
+
+@app.teardown_request
+def release_in_flight(exc):
+    if g.pop('in_flight', False):
+        metrics.inc('daa_http_requests_in_flight', value=-1)
+
+# ============================================================================
+# BACKGROUND JOBS
+# ============================================================================
+
+class JobCancelled(Exception):
+    pass
+
+class JobManager:
+    """Runs batch work on a bounded thread pool and tracks per-job progress"""
+    
+    def __init__(self, max_workers, max_pending, history):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='daa-job')
+        self._max_pending = max_pending
+        self._history = history
+        self._jobs = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, kind, func):
+        job = {
+            'id': uuid.uuid4().hex,
+            'kind': kind,
+            'status': 'queued',
+            'done': 0,
+            'total': None,
+            'current': None,
+            'completed_datasets': [],
+            'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'started': None,
+            'finished': None,
+            'error': None,
+            'result': None,
+            'cancel_requested': False
+        }
+        
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j['status'] in ('queued', 'running'))
+            if pending >= self._max_pending:
+                return None
+            self._jobs[job['id']] = job
+            self._prune()
+        
+        self._executor.submit(self._run, job, func)
+        return job
+    
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j['status'] not in ('queued', 'running')]
+        for job in finished[:max(0, len(finished) - self._history)]:
+            del self._jobs[job['id']]
+    
+    def _run(self, job, func):
+        if job['cancel_requested']:
+            job['status'] = 'cancelled'
+            return
+        
+        job['status'] = 'running'
+        job['started'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        def progress(done, total, name):
+            job['done'] = done
+            job['total'] = total
+            job['current'] = name
+            job['completed_datasets'].append(name)
+            if job['cancel_requested']:
+                raise JobCancelled()
+        
+        try:
+            job['result'] = func(progress)
+            job['status'] = 'completed'
+        except JobCancelled:
+            job['status'] = 'cancelled'
+        except Exception as e:
+            job['status'] = 'failed'
+            job['error'] = str(e)
+        finally:
+            job['finished'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None and job['status'] in ('queued', 'running'):
+            job['cancel_requested'] = True
+        return job
+    
+    def describe(self, job):
+        return {k: (list(v) if isinstance(v, list) else v) for k, v in job.items() if k != 'result'}
+    
+    def list(self):
+        with self._lock:
+            return [self.describe(j) for j in self._jobs.values()]
+
+jobs = JobManager(app.config['JOB_WORKERS'], app.config['JOB_MAX_PENDING'], app.config['JOB_HISTORY'])
+
+# ============================================================================
+# RESULT CACHE
+# ============================================================================
+
+class ResultCache:
+    """LRU of response payloads keyed by content hash + engine, bounded by bytes.
+    
+    The optional disk tier is an LRU too, bounded by max_disk_bytes of files;
+    recency survives restarts through the files' mtimes.
+    """
+    
+    def __init__(self, name, max_bytes, disk_dir=None, max_disk_bytes=None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._disk = OrderedDict()  # key -> file size, least recently used first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._scan_disk()
+    
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f'{key}.json')
+    
+    def _scan_disk(self):
+        found = []
+        with os.scandir(self.disk_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json'):
+                    file_stat = entry.stat()
+                    found.append((file_stat.st_mtime_ns, entry.name[:-len('.json')], file_stat.st_size))
+        for _, key, size in sorted(found):
+            self._disk[key] = size
+            self._disk_bytes += size
+        with self._lock:
+            self._evict_disk()
+    
+    def _evict_disk(self):
+        """Drop least recently used files until the disk tier fits; call with the lock held"""
+        if self.max_disk_bytes is None:
+            return
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.disk_evictions += 1
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+    
+    def _load(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), 'r') as f:
+                    payload = json.load(f)
+            except (OSError, ValueError):
+                return None
+            if payload.get('type') == 'karatsuba':
+                payload = dict(payload, **{name: int(payload[name], 16) for name in BIG_INT_FIELDS})
+            self.put(key, payload, persist=False)
+            with self._lock:
+                self.disk_hits += 1
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+            try:
+                os.utime(self._disk_path(key))
+            except OSError:
+                pass
+            return payload
+        return None
+    
+    def get(self, *keys):
+        """First cached payload among keys; one lookup counts as one hit or miss"""
+        for key in keys:
+            payload = self._load(key)
+            if payload is not None:
+                record_cache(self.name, True)
+                return payload
+        
+        with self._lock:
+            self.misses += 1
+        record_cache(self.name, False)
+        return None
+    
+    def put(self, key, payload, persist=True):
+        if persist and self.disk_dir:
+            stored = payload
+            if payload['type'] == 'karatsuba':
+                # Hex converts in linear time, unlike decimal str()/int()
+                stored = dict(payload, **{name: format(payload[name], 'x') for name in BIG_INT_FIELDS})
+            with atomic_write(self._disk_path(key)) as f:
+                json.dump(stored, f)
+                disk_size = f.tell()
+            with self._lock:
+                self._disk_bytes += disk_size - self._disk.pop(key, 0)
+                self._disk[key] = disk_size
+                self._evict_disk()
+        
+        size = payload_size(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (payload, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0,
+                'disk_dir': self.disk_dir,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes,
+                'max_disk_bytes': self.max_disk_bytes,
+                'disk_evictions': self.disk_evictions
+            }
+
+# Karatsuba payloads keep these as Python ints; only the JSON branch pays for str()
+BIG_INT_FIELDS = ('x', 'y', 'result')
+
+# Measured with tracemalloc: a point held as a tuple costs a list slot (8),
+# the 2-tuple (56) and two floats (24 each), 112 bytes; points read back from
+# the disk tier are 2-element lists, 128 bytes
+PAYLOAD_POINT_BYTES = 128
+
+def payload_size(payload):
+    """Approximate in-memory size of a cached payload, without walking it.
+    
+    Point payloads are charged for the points they actually hold, which for
+    a compact payload is the drawing sample rather than num_points.
+    """
+    if payload['type'] in ('closest_pair', 'bichromatic'):
+        return 512 + PAYLOAD_POINT_BYTES * len(payload['points'])
+    if payload['type'] == 'closest_pair_nd':
+        return 512 + 48 * payload['dimensions']
+    return 512 + sum(decimal_digits(payload[name]) for name in BIG_INT_FIELDS)
+
+def result_cache_key(digest, engine, variant='euclidean', typecode='d'):
+    """variant is the metric, or the epsilon for approximate runs; it only splits point engines.
+    
+    typecode is the precision the points were computed from, so float32
+    (compact) results never answer a float64 lookup.
+    """
+    suffix = '' if variant == 'euclidean' or engine not in ('closest_pair', 'closest_pair_approx') else f'-{variant}'
+    if typecode == 'f':
+        suffix += '-f32'
+    return f"{digest}-{engine}{suffix}-v{ENGINE_VERSIONS[engine]}"
+
+result_cache = ResultCache('result', app.config['RESULT_CACHE_BYTES'], app.config['RESULT_CACHE_DIR'],
+                           app.config['RESULT_CACHE_DISK_BYTES'])
+
+def closest_pair_payload(points, metric='euclidean'):
+    with timed('compute'):
+        counters = new_op_counters('closest_pair')
+        start_time = time.time()
+        pair, dist = closest_pair_of_points(points, counters, metric)
+        end_time = time.time()
+    
+    execution_time = (end_time - start_time) * 1000
+    record_engine_run('closest_pair', execution_time, len(points))
+    
+    return {
+        'success': True,
+        'type': 'closest_pair',
+        'num_points': len(points),
+        'points': points,
+        'bounds': point_bounds(points)[0],
+        'closest_pair': pair,
+        'distance': dist,
+        'metric': metric,
+        'execution_time_ms': execution_time,
+        'counters': counters
+    }
+
+def scaled_decimal(value, places):
+    """Exact decimal string for the non-negative int value / 10**places"""
+    if not places:
+        return str(value)
+    digits = str(value).rjust(places + 1, '0')
+    return f"{digits[:-places]}.{digits[-places:]}"
+
+def approximate_closest_pair_payload(coords, epsilon):
+    """Approximate above APPROX_MIN_POINTS, exact (with lower_bound == distance) below it"""
+    n = len(coords) // 2
+    if n < app.config['APPROX_MIN_POINTS']:
+        payload = closest_pair_payload(points_from_array(coords))
+        return dict(payload, approximate=False, lower_bound=payload['distance'])
+    
+    with timed('compute'):
+        start_time = time.time()
+        pair, dist, lower_bound = approximate_closest_pair(coords, epsilon)
+        end_time = time.time()
+    
+    execution_time = (end_time - start_time) * 1000
+    points = points_from_array(coords)
+    record_engine_run('closest_pair_approx', execution_time, n)
     
-    return pair, min_dist
+    return {
+        'success': True,
+        'type': 'closest_pair',
+        'num_points': n,
+        'points': points,
+        'bounds': point_bounds(points)[0],
+        'closest_pair': pair,
+        'distance': dist,
+        'metric': 'euclidean',
+        'approximate': True,
+        'epsilon': epsilon,
+        'lower_bound': lower_bound,
+        'execution_time_ms': execution_time,
+        'counters': None
+    }
 
-def closest_pair_recursive(px, py):
-    n = len(px)
+def compact_closest_pair_payload(coords, filepath):
+    """Closest pair payload for a float32 dataset.
     
-    if n <= 3:
-        return brute_force_closest(px)
+    Only a MAX_VIS_POINTS sample is stored: rows are picked from the array
+    and their coordinates re-read from the file, so the drawing shows the
+    float64 values and the cached payload stays small. num_points is the
+    full count.
+    """
+    with timed('compute'):
+        counters = new_op_counters('closest_pair')
+        start_time = time.time()
+        pair, dist, rows = closest_pair_compact(coords, counters, float32_slack(coords))
+        end_time = time.time()
+    with timed('verify'):
+        if rows:
+            with open(filepath) as f:
+                pair, dist, _ = reverify_float64(rows, f)
     
-    mid = n // 2
-    midpoint = px[mid]
+    execution_time = (end_time - start_time) * 1000
+    n = len(coords) // 2
+    record_engine_run('closest_pair', execution_time, n)
     
-    pyl = [p for p in py if p[0] <= midpoint[0]]
-    pyr = [p for p in py if p[0] > midpoint[0]]
+    with timed('decimate'):
+        sample = decimate_rows(coords, app.config['MAX_VIS_POINTS'])
+        with open(filepath) as f:
+            exact = read_rows(sample, f)
+        points = [exact[r] for r in sample]
+        if pair:
+            seen = set(points)
+            points.extend(p for p in pair if p not in seen)
+        bounds = point_bounds(points)[0]
     
-    pair_left, dl = closest_pair_recursive(px[:mid], pyl)
-    pair_right, dr = closest_pair_recursive(px[mid:], pyr)
+    return {
+        'success': True,
+        'type': 'closest_pair',
+        'num_points': n,
+        'points': points,
+        'bounds': bounds,
+        'closest_pair': pair,
+        'distance': dist,
+        'metric': 'euclidean',
+        'compact': True,
+        'execution_time_ms': execution_time,
+        'counters': counters
+    }
+
+def exact_closest_pair_payload(scale, coords):
+    with timed('compute'):
+        counters = new_op_counters('closest_pair')
+        start_time = time.time()
+        pair, dist, d2 = closest_pair_exact(coords, scale, counters)
+        end_time = time.time()
     
-    if dl < dr:
-        d = dl
-        min_pair = pair_left
-    else:
-        d = dr
-        min_pair = pair_right
+    execution_time = (end_time - start_time) * 1000
+    points = [(x / scale, y / scale) for x, y in zip(coords[0::2], coords[1::2])]
+    record_engine_run('closest_pair_exact', execution_time, len(points))
     
-    strip = [p for p in py if abs(p[0] - midpoint[0]) < d]
-    strip_pair, strip_dist = strip_closest(strip, d)
+    return {
+        'success': True,
+        'type': 'closest_pair',
+        'num_points': len(points),
+        'points': points,
+        'bounds': point_bounds(points)[0],
+        'closest_pair': pair,
+        'distance': dist,
+        'metric': 'euclidean',
+        'exact': True,
+        'scale': scale,
+        # Exact decimal strings; JSON numbers would round them again
+        'squared_distance': None if d2 is None else scaled_decimal(d2, 2 * (len(str(scale)) - 1)),
+        'squared_distance_scaled': None if d2 is None else str(d2),
+        'execution_time_ms': execution_time,
+        'counters': counters
+    }
+
+def closest_pair_nd_payload(dim, coords):
+    with timed('compute'):
+        counters = new_op_counters('closest_pair')
+        start_time = time.time()
+        pair, dist = closest_pair_nd(coords, dim, counters)
+        end_time = time.time()
     
-    if strip_pair and strip_dist < d:
-        return strip_pair, strip_dist
-    else:
-        return min_pair, d
+    execution_time = (end_time - start_time) * 1000
+    record_engine_run('closest_pair_nd', execution_time, len(coords) // dim)
+    
+    return {
+        'success': True,
+        'type': 'closest_pair_nd',
+        'num_points': len(coords) // dim,
+        'dimensions': dim,
+        'closest_pair': pair,
+        'distance': dist if pair else None,
+        'execution_time_ms': execution_time,
+        'counters': counters
+    }
 
-def closest_pair_of_points(points):
-    if len(points) < 2:
-        return None, float('inf')
+def top_pairs(points, k, metric='euclidean'):
+    """k closest pairs for the API under a planar metric; k is capped by TOP_PAIRS_MAX_K"""
+    k = min(k, app.config['TOP_PAIRS_MAX_K'])
+    with timed('top_pairs'):
+        start_time = time.time()
+        pairs = k_closest_pairs(points, k, metric=metric)
+        end_time = time.time()
+    record_engine_run('top_pairs', (end_time - start_time) * 1000, len(points))
+    return [{'pair': pair, 'distance': dist} for pair, dist in pairs]
+
+def bichromatic_payload(sets):
+    (label_a, points_a), (label_b, points_b) = sets
+    with timed('compute'):
+        counters = new_op_counters('closest_pair')
+        start_time = time.time()
+        pair, dist = bichromatic_closest_pair(points_a, points_b, counters)
+        end_time = time.time()
     
-    px = sorted(points, key=lambda p: p[0])
-    py = sorted(points, key=lambda p: p[1])
+    execution_time = (end_time - start_time) * 1000
+    points = points_a + points_b
+    record_engine_run('bichromatic', execution_time, len(points))
     
-    return closest_pair_recursive(px, py)
+    return {
+        'success': True,
+        'type': 'bichromatic',
+        'num_points': len(points),
+        'labels': [label_a, label_b],
+        'set_sizes': [len(points_a), len(points_b)],
+        'points': points,
+        'bounds': point_bounds(points)[0],
+        'closest_pair': pair,
+        'distance': dist,
+        'execution_time_ms': execution_time,
+        'counters': counters
+    }
 
-def karatsuba(x, y):
-    if x < 10 or y < 10:
-        return x * y
+def karatsuba_payload(x, y):
+    with timed('compute'):
+        counters = new_op_counters('karatsuba')
+        start_time = time.time()
+        result = karatsuba(x, y, counters)
+        end_time = time.time()
     
-    n = max(len(str(x)), len(str(y)))
-    m = n // 2
+    execution_time = (end_time - start_time) * 1000
+    record_engine_run('karatsuba', execution_time, max(decimal_digits(x), decimal_digits(y)))
+    with timed('verify'):
+        expected = x * y
+        verified = (result == expected)
     
-    high1, low1 = divmod(x, 10**m)
-    high2, low2 = divmod(y, 10**m)
+    return {
+        'success': True,
+        'type': 'karatsuba',
+        'x': x,
+        'y': y,
+        'x_digits': exact_decimal_digits(x),
+        'y_digits': exact_decimal_digits(y),
+        'result': result,
+        'result_digits': exact_decimal_digits(result),
+        'verified': verified,
+        'execution_time_ms': execution_time,
+        'counters': counters
+    }
+
+def payload_from_content(engine, content, variant='euclidean'):
+    if engine == 'closest_pair':
+        with timed('parse'):
+            points = parse_points_file(content)
+        return closest_pair_payload(points, variant)
+    if engine == 'closest_pair_approx':
+        with timed('parse'):
+            coords = parse_points_array(content)
+        return approximate_closest_pair_payload(coords, float(variant))
+    if engine == 'bichromatic':
+        with timed('parse'):
+            sets = parse_labelled_points_file(content)
+        return bichromatic_payload(sets)
+    if engine == 'closest_pair_exact':
+        with timed('parse'):
+            scale, coords = parse_points_exact(content)
+        return exact_closest_pair_payload(scale, coords)
+    with timed('parse'):
+        x, y = parse_integers_file(content)
+    return karatsuba_payload(x, y)
+
+def cached_payload(raw, engines, variant='euclidean'):
+    """Serve the first engine with a cached result, else compute with the first engine that parses"""
+    with timed('hash'):
+        digest = hashlib.sha256(raw).hexdigest()
     
-    z0 = karatsuba(low1, low2)
-    z1 = karatsuba((low1 + high1), (low2 + high2))
-    z2 = karatsuba(high1, high2)
+    payload = result_cache.get(*[result_cache_key(digest, engine, variant) for engine in engines])
+    if payload is not None:
+        return dict(payload, cached=True)
     
-    return (z2 * 10**(2*m)) + ((z1 - z2 - z0) * 10**m) + z0
+    content = raw.decode('utf-8')
+    for engine in engines:
+        try:
+            payload = payload_from_content(engine, content, variant)
+        except CoordinateRangeError:
+            # The file did parse; another format would only hide the real problem
+            raise
+        except Exception:
+            if engine == engines[-1]:
+                raise
+            continue
+        result_cache.put(result_cache_key(digest, engine, variant), payload)
+        return dict(payload, cached=False)
 
 # ============================================================================
-# DATASET GENERATION
+# BINARY TRANSPORT
 # ============================================================================
 
-def generate_points_dataset(num_points, min_coord=-1000, max_coord=1000):
-    points = []
-    for _ in range(num_points):
-        x = random.uniform(min_coord, max_coord)
-        y = random.uniform(min_coord, max_coord)
-        points.append((x, y))
-    return points
-
-def generate_integer_dataset(num_digits_range):
-    num_digits = random.randint(num_digits_range[0], num_digits_range[1])
-    x = random.randint(10**(num_digits-1), 10**num_digits - 1)
-    y = random.randint(10**(num_digits-1), 10**num_digits - 1)
-    return x, y
+# Layout: b'DAAB' | uint16 version | uint32 header length | JSON header | sections
+# (all little-endian). The header carries the scalar result fields plus a
+# 'sections' list of {name, dtype, offset, length[, shape, negative]} where
+# offset is relative to the end of the header. Points are '<f8' rows of (x, y);
+# integers are 'uint-le' magnitudes with the sign in 'negative'; all-nearest
+# results are '<i8' indices followed by '<f8' distances.
+BINARY_MIMETYPE = 'application/vnd.daa.binary'
+BINARY_MAGIC = b'DAAB'
+BINARY_VERSION = 1
 
-# ============================================================================
-# FILE PARSING
-# ============================================================================
+def pack_points(points):
+    coords = array('d')
+    for p in points:
+        coords.append(p[0])
+        coords.append(p[1])
+    if sys.byteorder == 'big':
+        coords.byteswap()
+    return coords.tobytes()
 
-def parse_points_file(file_content):
-    lines = file_content.strip().split('\n')
-    n = int(lines[0])
-    points = []
-    for i in range(1, min(n + 1, len(lines))):
-        parts = lines[i].strip().split()
-        if len(parts) >= 2:
-            x, y = float(parts[0]), float(parts[1])
-            points.append((x, y))
-    return points
+def pack_int(value):
+    magnitude = abs(value)
+    return magnitude.to_bytes((magnitude.bit_length() + 7) // 8, 'little')
 
-def parse_integers_file(file_content):
-    lines = file_content.strip().split('\n')
-    x = int(lines[0].strip())
-    y = int(lines[1].strip())
-    return x, y
+def binary_sections_response(header, sections):
+    """Binary body from (name, dtype, data, layout) sections; data is bytes or an array"""
+    with timed('serialize'):
+        header = dict(header)
+        header['timings'] = {phase: round(ms, 3) for phase, ms in g.get('timings', {}).items()}
+        layout = []
+        blobs = []
+        offset = 0
+        for name, dtype, data, extra in sections:
+            if isinstance(data, array):
+                if sys.byteorder == 'big':
+                    data = array(data.typecode, data)
+                    data.byteswap()
+                data = data.tobytes()
+            layout.append(dict({'name': name, 'dtype': dtype}, **extra, offset=offset, length=len(data)))
+            blobs.append(data)
+            offset += len(data)
+        header['sections'] = layout
+        header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        body = b''.join([BINARY_MAGIC, struct.pack('<HI', BINARY_VERSION, len(header_bytes)), header_bytes] + blobs)
+    
+    response = make_response(body)
+    response.headers['Content-Type'] = BINARY_MIMETYPE
+    response.headers['Vary'] = 'Accept'
+    return response
 
-def read_points_file(filepath):
-    with open(filepath, 'r') as f:
-        n = int(f.readline().strip())
-        points = []
-        for line in f:
-            x, y = map(float, line.strip().split())
-            points.append((x, y))
-    return points
+def binary_response(payload):
+    header = {k: v for k, v in payload.items() if k not in ('points',) + BIG_INT_FIELDS}
+    
+    if payload['type'] in ('closest_pair', 'bichromatic'):
+        sections = [('points', '<f8', pack_points(payload['points']), {'shape': [len(payload['points']), 2]})]
+    elif payload['type'] == 'closest_pair_nd':
+        # Only the pair is returned, which the header already carries
+        sections = []
+    else:
+        sections = [(name, 'uint-le', pack_int(payload[name]), {'negative': payload[name] < 0})
+                    for name in BIG_INT_FIELDS]
+    return binary_sections_response(header, sections)
 
-def read_integers_file(filepath):
-    with open(filepath, 'r') as f:
-        x = int(f.readline().strip())
-        y = int(f.readline().strip())
-    return x, y
+def negotiated_response(payload):
+    """Binary when the client prefers BINARY_MIMETYPE over JSON, else JSON"""
+    if request.accept_mimetypes.best_match(['application/json', BINARY_MIMETYPE]) == BINARY_MIMETYPE:
+        return binary_response(payload)
+    if payload['type'] == 'karatsuba':
+        with timed('stringify'):
+            payload = dict(payload, **{name: str(payload[name]) for name in BIG_INT_FIELDS})
+    return timed_jsonify(payload)
 
 # ============================================================================
 # FLASK ROUTES
@@ -180,52 +3369,10 @@ def index():
 @app.route('/api/generate-datasets', methods=['POST'])
 def generate_datasets():
     try:
-        generated_files = []
-        
-        # Generate 10 closest pair datasets
-        point_sizes = [150, 200, 300, 500, 1000, 120, 180, 250, 400, 800]
-        
-        for i, size in enumerate(point_sizes, 1):
-            points = generate_points_dataset(size)
-            filename = f'closest_pair_input_{i}.txt'
-            filepath = os.path.join(app.config['DATASET_FOLDER'], filename)
-            
-            with open(filepath, 'w') as f:
-                f.write(f"{len(points)}\n")
-                for point in points:
-                    f.write(f"{point[0]:.6f} {point[1]:.6f}\n")
-            
-            file_stat = os.stat(filepath)
-            generated_files.append({
-                'name': filename,
-                'type': 'closest_pair',
-                'size': file_stat.st_size,
-                'points': size,
-                'timestamp': datetime.fromtimestamp(file_stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-            })
-        
-        # Generate 10 karatsuba datasets
-        digit_ranges = [(120, 150), (150, 200), (200, 250), (300, 350), (400, 450),
-                        (110, 130), (140, 160), (180, 220), (250, 300), (350, 400)]
-        
-        for i, digit_range in enumerate(digit_ranges, 1):
-            x, y = generate_integer_dataset(digit_range)
-            filename = f'integer_mult_input_{i}.txt'
-            filepath = os.path.join(app.config['DATASET_FOLDER'], filename)
-            
-            with open(filepath, 'w') as f:
-                f.write(f"{x}\n{y}\n")
-            
-            file_stat = os.stat(filepath)
-            generated_files.append({
-                'name': filename,
-                'type': 'karatsuba',
-                'size': file_stat.st_size,
-                'digits': f"{len(str(x))}, {len(str(y))}",
-                'timestamp': datetime.fromtimestamp(file_stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-            })
+        with dataset_dir_lock(app.config['DATASET_FOLDER']):
+            generated_files = generate_all_datasets(app.config['DATASET_FOLDER'])
         
-        return jsonify({
+        return timed_jsonify({
             'success': True,
             'total_files': len(generated_files),
             'files': generated_files
@@ -235,103 +3382,14 @@ def generate_datasets():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/apply-algorithms', methods=['POST'])
+@profiled
 def apply_algorithms():
     try:
-        results = []
-        dataset_dir = app.config['DATASET_FOLDER']
-        
-        # Process closest pair files
-        closest_files = sorted([f for f in os.listdir(dataset_dir) if f.startswith('closest_pair_input_')])
-        
-        for filename in closest_files:
-            filepath = os.path.join(dataset_dir, filename)
-            points = read_points_file(filepath)
-            
-            start_time = time.time()
-            pair, min_dist = closest_pair_of_points(points)
-            end_time = time.time()
-            
-            execution_time = (end_time - start_time) * 1000
-            
-            results.append({
-                'filename': filename,
-                'type': 'closest_pair',
-                'num_points': len(points),
-                'distance': min_dist,
-                'execution_time_ms': execution_time,
-                'status': 'success'
-            })
-        
-        # Process karatsuba files
-        karatsuba_files = sorted([f for f in os.listdir(dataset_dir) if f.startswith('integer_mult_input_')])
-        
-        for filename in karatsuba_files:
-            filepath = os.path.join(dataset_dir, filename)
-            x, y = read_integers_file(filepath)
-            
-            start_time = time.time()
-            result = karatsuba(x, y)
-            end_time = time.time()
-            
-            execution_time = (end_time - start_time) * 1000
-            expected = x * y
-            verified = (result == expected)
-            
-            results.append({
-                'filename': filename,
-                'type': 'karatsuba',
-                'x_digits': len(str(x)),
-                'y_digits': len(str(y)),
-                'result_digits': len(str(result)),
-                'verified': verified,
-                'execution_time_ms': execution_time,
-                'status': 'success' if verified else 'failed'
-            })
-        
-        # Calculate statistics
-        closest_results = [r for r in results if r['type'] == 'closest_pair']
-        karatsuba_results = [r for r in results if r['type'] == 'karatsuba']
-        
-        stats = {
-            'closest_pair': {
-                'total': len(closest_results),
-                'avg_time': sum(r['execution_time_ms'] for r in closest_results) / len(closest_results) if closest_results else 0,
-                'min_time': min(r['execution_time_ms'] for r in closest_results) if closest_results else 0,
-                'max_time': max(r['execution_time_ms'] for r in closest_results) if closest_results else 0
-            },
-            'karatsuba': {
-                'total': len(karatsuba_results),
-                'avg_time': sum(r['execution_time_ms'] for r in karatsuba_results) / len(karatsuba_results) if karatsuba_results else 0,
-                'min_time': min(r['execution_time_ms'] for r in karatsuba_results) if karatsuba_results else 0,
-                'max_time': max(r['execution_time_ms'] for r in karatsuba_results) if karatsuba_results else 0,
-                'all_verified': all(r['verified'] for r in karatsuba_results)
-            }
-        }
+        force = request.args.get('force') == '1'
+        with dataset_dir_lock(app.config['DATASET_FOLDER']):
+            results, stats = apply_all_algorithms(app.config['DATASET_FOLDER'], force=force)
         
-        # Save results to files
-        with open(os.path.join(dataset_dir, 'closest_pair_results.txt'), 'w') as f:
-            f.write("CLOSEST PAIR OF POINTS - RESULTS\n")
-            f.write("="*80 + "\n\n")
-            for r in closest_results:
-                f.write(f"Dataset: {r['filename']}\n")
-                f.write(f"Number of points: {r['num_points']}\n")
-                f.write(f"Distance: {r['distance']:.6f}\n")
-                f.write(f"Execution time: {r['execution_time_ms']:.4f} ms\n")
-                f.write("-"*80 + "\n\n")
-        
-        with open(os.path.join(dataset_dir, 'integer_mult_results.txt'), 'w') as f:
-            f.write("KARATSUBA INTEGER MULTIPLICATION - RESULTS\n")
-            f.write("="*80 + "\n\n")
-            for r in karatsuba_results:
-                f.write(f"Dataset: {r['filename']}\n")
-                f.write(f"First integer digits: {r['x_digits']}\n")
-                f.write(f"Second integer digits: {r['y_digits']}\n")
-                f.write(f"Result digits: {r['result_digits']}\n")
-                f.write(f"Verification: {'PASSED' if r['verified'] else 'FAILED'}\n")
-                f.write(f"Execution time: {r['execution_time_ms']:.4f} ms\n")
-                f.write("-"*80 + "\n\n")
-        
-        return jsonify({
+        return timed_jsonify({
             'success': True,
             'results': results,
             'statistics': stats
@@ -343,30 +3401,34 @@ def apply_algorithms():
 @app.route('/api/list-files', methods=['GET'])
 def list_files():
     try:
-        dataset_dir = app.config['DATASET_FOLDER']
-        files = []
-        
-        if os.path.exists(dataset_dir):
-            for filename in os.listdir(dataset_dir):
-                if filename.endswith('.txt') and (filename.startswith('closest_pair_input_') or filename.startswith('integer_mult_input_')):
-                    filepath = os.path.join(dataset_dir, filename)
-                    file_stat = os.stat(filepath)
-                    
-                    file_type = 'closest_pair' if filename.startswith('closest_pair') else 'karatsuba'
-                    
-                    files.append({
-                        'name': filename,
-                        'type': file_type,
-                        'size': file_stat.st_size,
-                        'timestamp': datetime.fromtimestamp(file_stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                    })
-        
-        files.sort(key=lambda x: x['name'])
-        
-        return jsonify({
+        file_type = request.args.get('type')
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 0, type=int)
+        
+        files, version = dataset_listing(app.config['DATASET_FOLDER'])
+        
+        etag = hashlib.sha1(f"{version}:{app.config['DATASET_FOLDER']}:{file_type}:{page}:{per_page}".encode()).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+        
+        if file_type:
+            files = [f for f in files if f['type'] == file_type]
+        total = len(files)
+        if per_page > 0:
+            start = (max(page, 1) - 1) * per_page
+            files = files[start:start + per_page]
+        
+        response = make_response(timed_jsonify({
             'success': True,
-            'files': files
-        })
+            'files': files,
+            'total': total,
+            'page': page if per_page > 0 else 1,
+            'per_page': per_page if per_page > 0 else total
+        }))
+        response.set_etag(etag)
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -385,56 +3447,75 @@ def visualize_file():
         if not os.path.exists(filepath):
             return jsonify({'error': 'File not found'}), 404
         
-        if filename.startswith('closest_pair'):
-            points = read_points_file(filepath)
-            
-            start_time = time.time()
-            pair, dist = closest_pair_of_points(points)
-            end_time = time.time()
-            
-            execution_time = (end_time - start_time) * 1000
-            
-            return jsonify({
-                'success': True,
-                'type': 'closest_pair',
-                'num_points': len(points),
-                'points': points,
-                'closest_pair': pair,
-                'distance': dist,
-                'execution_time_ms': execution_time
-            })
-            
+        if filename.startswith('closest_pair_nd'):
+            engine = 'closest_pair_nd'
+        elif filename.startswith('closest_pair'):
+            engine = 'closest_pair'
         elif filename.startswith('integer_mult'):
-            x, y = read_integers_file(filepath)
-            
-            start_time = time.time()
-            result = karatsuba(x, y)
-            end_time = time.time()
-            
-            execution_time = (end_time - start_time) * 1000
-            expected = x * y
-            verified = (result == expected)
-            
-            return jsonify({
-                'success': True,
-                'type': 'karatsuba',
-                'x': str(x),
-                'y': str(y),
-                'x_digits': len(str(x)),
-                'y_digits': len(str(y)),
-                'result': str(result),
-                'result_digits': len(str(result)),
-                'verified': verified,
-                'execution_time_ms': execution_time
-            })
-        
+            engine = 'karatsuba'
         else:
             return jsonify({'error': 'Unknown file type'}), 400
-            
+        
+        try:
+            max_points = int(data.get('max_points', app.config['MAX_VIS_POINTS']))
+            k = int(data.get('k', 1))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'max_points and k must be integers'}), 400
+        metric = data.get('metric', 'euclidean')
+        if metric not in DISTANCE_METRICS:
+            return jsonify({'error': f"Unknown metric; use one of {', '.join(DISTANCE_METRICS)}"}), 400
+        if engine == 'closest_pair_nd' and metric != 'euclidean':
+            return jsonify({'error': 'd-dimensional datasets only support the euclidean metric'}), 400
+        if k > 1 and metric not in METRIC_DISTANCES:
+            return jsonify({'error': f'k > 1 is not supported for the {metric} metric'}), 400
+        if data.get('exact') and engine == 'closest_pair':
+            if metric != 'euclidean':
+                return jsonify({'error': 'Exact mode only supports the euclidean metric'}), 400
+            engine = 'closest_pair_exact'
+        
+        # Only the euclidean closest pair re-verifies float32 answers in float64
+        typecode = point_typecode() if engine == 'closest_pair' and metric == 'euclidean' else 'd'
+        entry = dataset_store.get(filepath, engine, typecode)
+        key = result_cache_key(entry['sha256'], engine, metric, typecode)
+        # A float64 result is just as good an answer in compact mode, never the reverse
+        fallback = [result_cache_key(entry['sha256'], engine, metric)] if typecode == 'f' else []
+        payload = result_cache.get(key, *fallback)
+        if payload is not None:
+            payload = dict(payload, cached=True)
+        else:
+            if engine == 'closest_pair':
+                if typecode == 'f':
+                    payload = compact_closest_pair_payload(entry['data'], filepath)
+                else:
+                    payload = closest_pair_payload(points_from_array(entry['data']), metric)
+            elif engine == 'closest_pair_exact':
+                payload = exact_closest_pair_payload(*entry['data'])
+            elif engine == 'closest_pair_nd':
+                payload = closest_pair_nd_payload(*entry['data'])
+            else:
+                payload = karatsuba_payload(*entry['data'])
+            result_cache.put(key, payload)
+            payload = dict(payload, cached=False)
+        
+        if engine == 'closest_pair' and k > 1:
+            points = payload['points']
+            if payload.get('compact'):
+                points = points_from_array(dataset_store.get(filepath, 'closest_pair', 'd')['data'])
+            payload = dict(payload, top_pairs=top_pairs(points, k, metric))
+        
+        # Too many points to draw usefully; let the UI show a density tile instead
+        if payload['type'] == 'closest_pair' and payload['num_points'] >= app.config['HEATMAP_MIN_POINTS']:
+            payload['heatmap_tile'] = url_for('tile_png', filename=filename, z=0, tx=0, ty=0)
+        
+        return negotiated_response(lod_payload(payload, max_points))
+    
+    except CoordinateRangeError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/upload-and-visualize', methods=['POST'])
+@profiled
 def upload_and_visualize():
     try:
         if 'file' not in request.files:
@@ -444,59 +3525,340 @@ def upload_and_visualize():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        content = file.read().decode('utf-8')
+        with timed('read'):
+            raw = file.read()
         
-        # Try to detect file type and process
-        try:
-            # Try as closest pair
-            points = parse_points_file(content)
-            
-            start_time = time.time()
-            pair, dist = closest_pair_of_points(points)
-            end_time = time.time()
-            
-            execution_time = (end_time - start_time) * 1000
-            
-            return jsonify({
-                'success': True,
-                'type': 'closest_pair',
-                'num_points': len(points),
-                'points': points,
-                'closest_pair': pair,
-                'distance': dist,
-                'execution_time_ms': execution_time
-            })
-        except:
-            # Try as karatsuba
+        max_points = request.values.get('max_points', app.config['MAX_VIS_POINTS'], type=int)
+        metric = request.values.get('metric', 'euclidean')
+        if metric not in DISTANCE_METRICS:
+            return jsonify({'error': f"Unknown metric; use one of {', '.join(DISTANCE_METRICS)}"}), 400
+        k = request.values.get('k', 1, type=int)
+        if k > 1 and metric not in METRIC_DISTANCES:
+            return jsonify({'error': f'k > 1 is not supported for the {metric} metric'}), 400
+        
+        if request.values.get('approximate') in ('1', 'true'):
+            epsilon = request.values.get('epsilon', app.config['APPROX_EPSILON'], type=float)
+            if metric != 'euclidean' or not epsilon or epsilon <= 0:
+                return jsonify({'error': 'Approximate mode needs the euclidean metric and epsilon > 0'}), 400
             try:
-                x, y = parse_integers_file(content)
-                
-                start_time = time.time()
-                result = karatsuba(x, y)
-                end_time = time.time()
-                
-                execution_time = (end_time - start_time) * 1000
-                expected = x * y
-                verified = (result == expected)
-                
-                return jsonify({
-                    'success': True,
-                    'type': 'karatsuba',
-                    'x': str(x),
-                    'y': str(y),
-                    'x_digits': len(str(x)),
-                    'y_digits': len(str(y)),
-                    'result': str(result),
-                    'result_digits': len(str(result)),
-                    'verified': verified,
-                    'execution_time_ms': execution_time
-                })
-            except:
-                return jsonify({'error': 'Could not parse file as closest pair or karatsuba format'}), 400
+                payload = cached_payload(raw, ['closest_pair_approx'], repr(epsilon))
+            except Exception as e:
+                return jsonify({'error': f'Could not parse file as closest pair format: {e}'}), 400
+        elif request.values.get('exact') in ('1', 'true'):
+            if metric != 'euclidean':
+                return jsonify({'error': 'Exact mode only supports the euclidean metric'}), 400
+            try:
+                payload = cached_payload(raw, ['closest_pair_exact'])
+            except Exception as e:
+                return jsonify({'error': f'Could not read file as exact decimal points: {e}'}), 400
+        else:
+            # Try as two labelled point sets first, then closest pair, then karatsuba
+            try:
+                payload = cached_payload(raw, ['bichromatic', 'closest_pair', 'karatsuba'], metric)
+            except CoordinateRangeError as e:
+                return jsonify({'error': str(e)}), 400
+            except Exception:
+                return jsonify({'error': 'Could not parse file as labelled points, closest pair or karatsuba format'}), 400
+        
+        if payload['type'] == 'closest_pair' and k > 1:
+            payload = dict(payload, top_pairs=top_pairs(payload['points'], k, metric))
+        
+        return negotiated_response(lod_payload(payload, max_points))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/cache-stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        'success': True,
+        'result_cache': result_cache.stats(),
+        'dataset_store': dataset_store.stats()
+    })
+
+@app.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    with _slow_profiles_lock:
+        profiles = list(_slow_profiles)
+    return timed_jsonify({
+        'success': True,
+        'enabled': app.config['PROFILING_ENABLED'],
+        'profiles': profiles
+    })
+
+@app.route('/api/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    with _slow_profiles_lock:
+        entry = next((p for p in _slow_profiles if p['id'] == profile_id), None)
+    if entry is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    path = os.path.join(app.config['PROFILE_FOLDER'], entry['file'])
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=entry['file'])
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return render_metrics(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/api/jobs/generate-datasets', methods=['POST'])
+def submit_generate_job():
+    dataset_dir = app.config['DATASET_FOLDER']
+    
+    def run(progress):
+        with dataset_dir_lock(dataset_dir):
+            generated_files = generate_all_datasets(dataset_dir, progress)
+        return {'total_files': len(generated_files), 'files': generated_files}
+    
+    job = jobs.submit('generate-datasets', run)
+    if job is None:
+        return jsonify({'error': 'Too many pending jobs'}), 429
+    return jsonify({'success': True, 'job_id': job['id'], 'status': job['status']}), 202
+
+@app.route('/api/jobs/apply-algorithms', methods=['POST'])
+def submit_apply_job():
+    dataset_dir = app.config['DATASET_FOLDER']
+    force = request.args.get('force') == '1'
+    
+    def run(progress):
+        with dataset_dir_lock(dataset_dir):
+            results, stats = apply_all_algorithms(dataset_dir, progress, force=force)
+        return {'results': results, 'statistics': stats}
+    
+    job = jobs.submit('apply-algorithms', run)
+    if job is None:
+        return jsonify({'error': 'Too many pending jobs'}), 429
+    return jsonify({'success': True, 'job_id': job['id'], 'status': job['status']}), 202
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    return jsonify({'success': True, 'jobs': jobs.list()})
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': jobs.describe(job)})
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': jobs.describe(job)})
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] != 'completed':
+        return jsonify({'error': f"Job is {job['status']}", 'job': jobs.describe(job)}), 409
+    return jsonify({'success': True, **job['result']})
+
+@app.route('/api/tiles/<filename>/meta', methods=['GET'])
+def tile_meta(filename):
+    filepath = os.path.join(app.config['DATASET_FOLDER'], secure_filename(filename))
+    if not filename.startswith('closest_pair_input_') or not os.path.exists(filepath):
+        return jsonify({'error': 'File not found'}), 404
+    
+    entry = dataset_store.get(filepath, 'closest_pair', point_typecode())
+    tiles = tile_dataset(filepath, entry)
+    pair = tiles['pair']
+    return timed_jsonify({
+        'success': True,
+        'num_points': len(entry['data']) // 2,
+        'bounds': tiles['bounds'],
+        'tile_size': TILE_SIZE,
+        'closest_pair': pair,
+        'distance': distance(*pair) if pair else None,
+        'version': entry['sha256']
+    })
+
+@app.route('/api/tiles/<filename>/<int:z>/<int:tx>/<int:ty>.png', methods=['GET'])
+def tile_png(filename, z, tx, ty):
+    filepath = os.path.join(app.config['DATASET_FOLDER'], secure_filename(filename))
+    if not filename.startswith('closest_pair_input_') or not os.path.exists(filepath):
+        return jsonify({'error': 'File not found'}), 404
+    if z > app.config['TILE_MAX_ZOOM'] or not (0 <= tx < (1 << z) and 0 <= ty < (1 << z)):
+        return jsonify({'error': 'Tile out of range'}), 400
+    
+    entry = dataset_store.get(filepath, 'closest_pair', point_typecode())
+    if not entry['data']:
+        return jsonify({'error': 'Dataset is empty'}), 400
+    
+    response = make_response(heatmap_tile(filepath, entry, z, tx, ty))
+    response.headers['Content-Type'] = 'image/png'
+    response.set_etag(f"{entry['sha256']}-{entry['typecode']}-{z}-{tx}-{ty}")
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+@app.route('/api/kdtree/<filename>/nearest', methods=['GET'])
+def kdtree_nearest(filename):
+    filepath = os.path.join(app.config['DATASET_FOLDER'], secure_filename(filename))
+    if not filename.startswith('closest_pair_input_') or not os.path.exists(filepath):
+        return jsonify({'error': 'File not found'}), 404
+    try:
+        x = float(request.args['x'])
+        y = float(request.args['y'])
+        k = request.args.get('k', 1, type=int)
+    except (KeyError, ValueError):
+        return jsonify({'error': 'x and y are required numbers'}), 400
+    
+    tree = kdtree_for(filepath)
+    with timed('query'):
+        neighbours = tree.nearest(x, y, max(1, k))
+    return timed_jsonify({
+        'success': True,
+        'query': [x, y],
+        'neighbours': [{'index': i, 'point': p, 'distance': d} for d, i, p in neighbours]
+    })
+
+@app.route('/api/kdtree/<filename>/range', methods=['GET'])
+def kdtree_range(filename):
+    filepath = os.path.join(app.config['DATASET_FOLDER'], secure_filename(filename))
+    if not filename.startswith('closest_pair_input_') or not os.path.exists(filepath):
+        return jsonify({'error': 'File not found'}), 404
+    try:
+        box = [float(request.args[name]) for name in ('min_x', 'max_x', 'min_y', 'max_y')]
+    except (KeyError, ValueError):
+        return jsonify({'error': 'min_x, max_x, min_y and max_y are required numbers'}), 400
+    limit = request.args.get('limit', app.config['KDTREE_RANGE_LIMIT'], type=int)
+    
+    tree = kdtree_for(filepath)
+    with timed('query'):
+        found = tree.range_query(*box, limit=limit + 1)
+    return timed_jsonify({
+        'success': True,
+        'count': min(len(found), limit),
+        'truncated': len(found) > limit,
+        'points': [{'index': i, 'point': p} for i, p in found[:limit]]
+    })
+
+@app.route('/api/all-nearest/<filename>', methods=['GET'])
+def all_nearest(filename):
+    filepath = os.path.join(app.config['DATASET_FOLDER'], secure_filename(filename))
+    if not filename.startswith('closest_pair_input_') or not os.path.exists(filepath):
+        return jsonify({'error': 'File not found'}), 404
+    
+    coords = dataset_store.get(filepath, 'closest_pair')['data']
+    with timed('compute'):
+        start_time = time.time()
+        indices, distances = all_nearest_neighbours(coords)
+        end_time = time.time()
+    execution_time = (end_time - start_time) * 1000
+    record_engine_run('all_nearest', execution_time, len(indices))
+    
+    header = {
+        'success': True,
+        'type': 'all_nearest',
+        'num_points': len(indices),
+        'summary': nearest_neighbour_summary(distances),
+        'execution_time_ms': execution_time
+    }
+    if request.accept_mimetypes.best_match(['application/json', BINARY_MIMETYPE]) == BINARY_MIMETYPE:
+        return binary_sections_response(header, [
+            ('indices', '<i8', indices, {'shape': [len(indices)]}),
+            ('distances', '<f8', distances, {'shape': [len(distances)]})
+        ])
+    return timed_jsonify(dict(header, indices=indices.tolist(), distances=distances.tolist()))
+
+@app.route('/api/radius-pairs/<filename>', methods=['GET'])
+def radius_join(filename):
+    filepath = os.path.join(app.config['DATASET_FOLDER'], secure_filename(filename))
+    if not filename.startswith('closest_pair_input_') or not os.path.exists(filepath):
+        return jsonify({'error': 'File not found'}), 404
+    r = request.args.get('r', type=float)
+    if r is None or not r > 0:
+        return jsonify({'error': 'r must be a positive number'}), 400
+    
+    coords = dataset_store.get(filepath, 'closest_pair')['data']
+    if request.args.get('count_only') == '1':
+        with timed('compute'):
+            start_time = time.time()
+            count = count_radius_pairs(coords, r)
+            end_time = time.time()
+        execution_time = (end_time - start_time) * 1000
+        record_engine_run('radius_join', execution_time, len(coords) // 2)
+        return timed_jsonify({
+            'success': True,
+            'radius': r,
+            'count': count,
+            'execution_time_ms': execution_time
+        })
+    
+    # One "i j dist" line per pair, written as the grid scan finds them
+    def generate():
+        batch = []
+        for i, j, dist in radius_pairs(coords, r):
+            batch.append(f"{i} {j} {dist!r}\n")
+            if len(batch) == 1024:
+                yield ''.join(batch)
+                batch = []
+        yield ''.join(batch)
+    
+    return Response(stream_with_context(generate()), mimetype='text/plain')
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/anytime/<filename>', methods=['GET'])
+def anytime_stream(filename):
+    """Server-sent events: 'improved' for each better pair, then 'done' with the exact answer.
+    
+    Always runs on float64 points and caches under the float64 key; a
+    compact-mode /api/visualize-file falls back to that key, never the reverse.
+    """
+    filepath = os.path.join(app.config['DATASET_FOLDER'], secure_filename(filename))
+    if not filename.startswith('closest_pair_input_') or not os.path.exists(filepath):
+        return jsonify({'error': 'File not found'}), 404
+    
+    entry = dataset_store.get(filepath, 'closest_pair', 'd')
+    key = result_cache_key(entry['sha256'], 'closest_pair')
+    cached = result_cache.get(key)
+    
+    def generate():
+        if cached is not None:
+            yield sse_event('done', {'closest_pair': cached['closest_pair'],
+                                     'distance': cached['distance'] if cached['closest_pair'] else None,
+                                     'execution_time_ms': cached['execution_time_ms'], 'cached': True})
+            return
+        
+        points = points_from_array(entry['data'])
+        counters = new_op_counters('closest_pair')
+        start_time = time.time()
+        pair, dist = None, float('inf')
+        for pair, dist in anytime_closest_pair(points, counters):
+            yield sse_event('improved', {'closest_pair': pair, 'distance': dist,
+                                         'elapsed_ms': (time.time() - start_time) * 1000})
+        execution_time = (time.time() - start_time) * 1000
+        record_engine_run('closest_pair', execution_time, len(points))
+        
+        if pair is None:
+            # Fewer than two points; JSON has no Infinity, so report no distance
+            yield sse_event('done', {'closest_pair': None, 'distance': None,
+                                     'execution_time_ms': execution_time, 'cached': False})
+            return
+        
+        # Same payload /api/visualize-file would build, so the follow-up request is a cache hit
+        result_cache.put(key, {
+            'success': True,
+            'type': 'closest_pair',
+            'num_points': len(points),
+            'points': points,
+            'bounds': point_bounds(points)[0],
+            'closest_pair': pair,
+            'distance': dist,
+            'metric': 'euclidean',
+            'execution_time_ms': execution_time,
+            'counters': counters
+        })
+        yield sse_event('done', {'closest_pair': pair, 'distance': dist,
+                                 'execution_time_ms': execution_time, 'cached': False})
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 # ============================================================================
 # HTML TEMPLATE
 # ============================================================================
@@ -1030,13 +4392,13 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
                     <div class="file-info">
                         <div class="file-name">${file.name}</div>
                         <div class="file-meta">
-                            ${file.type === 'closest_pair' ? 'Points: ' + file.points : 'Digits: ' + file.digits} | 
+                            ${file.type === 'karatsuba' ? 'Digits: ' + file.digits : 'Points: ' + file.points}${file.dimensions ? ' (' + file.dimensions + '-D)' : ''} | 
                             Size: ${(file.size / 1024).toFixed(2)} KB | 
                             Created: ${file.timestamp}
                         </div>
                     </div>
-                    <span class="file-badge ${file.type === 'closest_pair' ? 'badge-closest' : 'badge-karatsuba'}">
-                        ${file.type === 'closest_pair' ? 'Closest Pair' : 'Karatsuba'}
+                    <span class="file-badge ${file.type === 'karatsuba' ? 'badge-karatsuba' : 'badge-closest'}">
+                        ${file.type === 'karatsuba' ? 'Karatsuba' : 'Closest Pair'}
                     </span>
                 `;
                 filesList.appendChild(fileItem);
@@ -1167,13 +4529,13 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
                     <div class="file-info">
                         <div class="file-name">${file.name}</div>
                         <div class="file-meta">
-                            Type: ${file.type === 'closest_pair' ? 'Closest Pair' : 'Karatsuba'} | 
+                            Type: ${file.type === 'karatsuba' ? 'Karatsuba' : 'Closest Pair'}${file.dimensions ? ' (' + file.dimensions + '-D)' : ''} | 
                             Size: ${(file.size / 1024).toFixed(2)} KB | 
                             Modified: ${file.timestamp}
                         </div>
                     </div>
-                    <span class="file-badge ${file.type === 'closest_pair' ? 'badge-closest' : 'badge-karatsuba'}">
-                        ${file.type === 'closest_pair' ? 'Closest Pair' : 'Karatsuba'}
+                    <span class="file-badge ${file.type === 'karatsuba' ? 'badge-karatsuba' : 'badge-closest'}">
+                        ${file.type === 'karatsuba' ? 'Karatsuba' : 'Closest Pair'}
                     </span>
                 `;
                 filesList.appendChild(fileItem);
@@ -1196,6 +4558,10 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             resultsDisplay.classList.add('show');
             
             try {
+                if (filename.startsWith('closest_pair_input_')) {
+                    await streamClosestPair(filename, visualizeContent);
+                }
+                
                 const response = await fetch('/api/visualize-file', {
                     method: 'POST',
                     headers: {
@@ -1216,17 +4582,37 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             }
         }
         
+        // Show improving upper bounds while the exact answer is computed; the
+        // server caches the result, so the visualize request that follows is instant
+        function streamClosestPair(filename, visualizeContent) {
+            return new Promise(resolve => {
+                const source = new EventSource(`/api/anytime/${encodeURIComponent(filename)}`);
+                source.addEventListener('improved', event => {
+                    const update = JSON.parse(event.data);
+                    visualizeContent.innerHTML = `<div class="loading show"><div class="spinner"></div><p>Best distance so far: ${update.distance.toFixed(6)} (${update.elapsed_ms.toFixed(0)} ms)</p></div>`;
+                });
+                source.addEventListener('done', () => {
+                    source.close();
+                    resolve();
+                });
+                source.onerror = () => {
+                    source.close();
+                    resolve();
+                };
+            });
+        }
+        
         function displayVisualizationResults(data) {
             const visualizeContent = document.getElementById('visualizeContent');
             
-            if (data.type === 'closest_pair') {
+            if (data.type === 'closest_pair' || data.type === 'bichromatic') {
                 visualizeContent.innerHTML = `
                     <div class="result-item success">
-                        <div class="result-label">✓ Closest Pair Algorithm Completed</div>
+                        <div class="result-label">✓ ${data.type === 'bichromatic' ? `Bichromatic Closest Pair (${data.labels[0]} / ${data.labels[1]})` : 'Closest Pair'} Algorithm Completed</div>
                     </div>
                     <div class="result-item">
                         <div class="result-label">Number of Points:</div>
-                        <div class="result-value">${data.num_points}</div>
+                        <div class="result-value">${data.num_points}${data.decimated ? ` (showing ${data.points_returned})` : ''}</div>
                     </div>
                     <div class="result-item">
                         <div class="result-label">Closest Pair:</div>
@@ -1244,7 +4630,39 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
                         <div class="result-value">${data.execution_time_ms.toFixed(4)} ms</div>
                     </div>
                 `;
-                drawPoints(data.points, data.closest_pair);
+                if (data.heatmap_tile) {
+                    drawHeatmap(data.heatmap_tile);
+                } else {
+                    drawPoints(data.points, data.closest_pair, data.bounds);
+                }
+            } else if (data.type === 'closest_pair_nd') {
+                const formatPoint = point => '(' + point.map(c => c.toFixed(4)).join(', ') + ')';
+                visualizeContent.innerHTML = `
+                    <div class="result-item success">
+                        <div class="result-label">✓ ${data.dimensions}-D Closest Pair Algorithm Completed</div>
+                    </div>
+                    <div class="result-item">
+                        <div class="result-label">Number of Points:</div>
+                        <div class="result-value">${data.num_points}</div>
+                    </div>
+                    <div class="result-item">
+                        <div class="result-label">Closest Pair:</div>
+                        <div class="result-value">
+                            ${data.closest_pair ? `Point 1: ${formatPoint(data.closest_pair[0])}<br>Point 2: ${formatPoint(data.closest_pair[1])}` : 'Fewer than two points'}
+                        </div>
+                    </div>
+                    <div class="result-item">
+                        <div class="result-label">Minimum Distance:</div>
+                        <div class="result-value">${data.distance === null ? '-' : data.distance.toFixed(6)}</div>
+                    </div>
+                    <div class="result-item">
+                        <div class="result-label">Execution Time:</div>
+                        <div class="result-value">${data.execution_time_ms.toFixed(4)} ms</div>
+                    </div>
+                `;
+                
+                // Nothing to draw on a 2-D canvas
+                document.getElementById('visualizeCanvas').style.display = 'none';
             } else if (data.type === 'karatsuba') {
                 const truncateNumber = (num, maxLength = 60) => {
                     if (num.length <= maxLength) return num;
@@ -1282,7 +4700,25 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             }
         }
         
-        function drawPoints(points, closestPair) {
+        function drawHeatmap(tileUrl) {
+            const canvas = document.getElementById('visualizeCanvas');
+            canvas.style.display = 'block';
+            const ctx = canvas.getContext('2d');
+            
+            canvas.width = canvas.offsetWidth;
+            canvas.height = 400;
+            ctx.clearRect(0, 0, canvas.width, canvas.height);
+            
+            const img = new Image();
+            img.onload = () => {
+                const size = canvas.height;
+                ctx.imageSmoothingEnabled = false;
+                ctx.drawImage(img, (canvas.width - size) / 2, 0, size, size);
+            };
+            img.src = tileUrl;
+        }
+        
+        function drawPoints(points, closestPair, bounds) {
             const canvas = document.getElementById('visualizeCanvas');
             canvas.style.display = 'block';
             const ctx = canvas.getContext('2d');
@@ -1292,12 +4728,18 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             
             ctx.clearRect(0, 0, canvas.width, canvas.height);
             
-            const xs = points.map(p => p[0]);
-            const ys = points.map(p => p[1]);
-            const minX = Math.min(...xs);
-            const maxX = Math.max(...xs);
-            const minY = Math.min(...ys);
-            const maxY = Math.max(...ys);
+            // Spreading large arrays into Math.min/max overflows the call stack
+            let minX = Infinity, maxX = -Infinity, minY = Infinity, maxY = -Infinity;
+            if (bounds) {
+                ({ min_x: minX, max_x: maxX, min_y: minY, max_y: maxY } = bounds);
+            } else {
+                for (const p of points) {
+                    if (p[0] < minX) minX = p[0];
+                    if (p[0] > maxX) maxX = p[0];
+                    if (p[1] < minY) minY = p[1];
+                    if (p[1] > maxY) maxY = p[1];
+                }
+            }
             
             const padding = 40;
             const scaleX = (canvas.width - 2 * padding) / (maxX - minX);
@@ -1386,6 +4828,28 @@ def setup_templates():
     print("✓ Templates created successfully")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Integrated Divide & Conquer Platform')
+    parser.add_argument('--jobs', type=int, default=app.config['APPLY_JOBS'],
+                        help='worker processes used when applying algorithms to all datasets')
+    parser.add_argument('--preload', action='store_true', default=app.config['DATASET_PRELOAD'],
+                        help='parse every dataset into memory before serving requests')
+    parser.add_argument('--compact', action='store_true', default=app.config['COMPACT_FLOAT32'],
+                        help='store point datasets as float32 and re-verify the closest pair in float64')
+    parser.add_argument('--scaling', action='store_true',
+                        help='print closest pair operation counts on adversarial inputs and exit')
+    args = parser.parse_args()
+    
+    if args.scaling:
+        for row in adversarial_scaling():
+            print(f"{row['kind']:<14} n={row['num_points']:<7} evals={row['distance_evals']:<9} "
+                  f"evals/(n log n)={row['evals_per_nlogn']:.3f} depth={row['max_depth']:<3} "
+                  f"{row['execution_time_ms']:.1f} ms")
+        sys.exit(0)
+    
+    app.config['APPLY_JOBS'] = max(1, args.jobs)
+    app.config['DATASET_PRELOAD'] = args.preload
+    app.config['COMPACT_FLOAT32'] = args.compact
+    
     print("="*80)
     print("INTEGRATED DIVIDE & CONQUER PLATFORM")
     print("="*80)
@@ -1397,6 +4861,10 @@ if __name__ == '__main__':
     
     setup_templates()
     
+    if app.config['DATASET_PRELOAD']:
+        loaded = dataset_store.preload(app.config['DATASET_FOLDER'])
+        print(f"✓ Preloaded {loaded} datasets into memory")
+    
     print("\n🚀 Starting Flask server...")
     print("📱 Access the application at: http://localhost:5000")
     print("Press CTRL+C to stop the server\n")
@@ -1,7 +1,9 @@
 import math
 import time
 import os
+import argparse
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
 # ALGORITHM IMPLEMENTATIONS (from Question 2)
 
@@ -120,7 +122,74 @@ def read_integers_file(filename):
 
 # APPLY ALGORITHMS TO DATASETS
 
-def apply_closest_pair_algorithm():
+def run_closest_pair_dataset(filepath):
+    """Read one points file and time the closest pair algorithm on it"""
+    points = read_points_file(filepath)
+    
+    # Measure execution time
+    start_time = time.time()
+    pair, min_dist = closest_pair_of_points(points)
+    end_time = time.time()
+    
+    execution_time = (end_time - start_time) * 1000  # Convert to milliseconds
+    
+    return {
+        'dataset': os.path.basename(filepath),
+        'num_points': len(points),
+        'pair': pair,
+        'distance': min_dist,
+        'time_ms': execution_time
+    }
+
+def run_karatsuba_dataset(filepath):
+    """Read one integers file, time Karatsuba on it and verify the product"""
+    x, y = read_integers_file(filepath)
+    
+    # Measure execution time
+    start_time = time.time()
+    result = karatsuba(x, y)
+    end_time = time.time()
+    
+    execution_time = (end_time - start_time) * 1000  # Convert to milliseconds
+    
+    # Verify with standard multiplication
+    expected = x * y
+    is_correct = (result == expected)
+    
+    return {
+        'dataset': os.path.basename(filepath),
+        'x_digits': len(str(x)),
+        'y_digits': len(str(y)),
+        'result_digits': len(str(result)),
+        'result': result,
+        'verified': is_correct,
+        'time_ms': execution_time
+    }
+
+def run_datasets(worker, filepaths, jobs=1):
+    """Run worker over every file, yielding (filepath, result, error) in input order.
+    
+    With jobs > 1 the files are spread over a process pool, largest file first so
+    the biggest inputs do not end up running alone at the tail of the batch.
+    """
+    if jobs <= 1:
+        for filepath in filepaths:
+            try:
+                yield filepath, worker(filepath), None
+            except Exception as e:
+                yield filepath, None, e
+        return
+    
+    order = sorted(range(len(filepaths)), key=lambda i: os.path.getsize(filepaths[i]), reverse=True)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {i: pool.submit(worker, filepaths[i]) for i in order}
+        for i, filepath in enumerate(filepaths):
+            try:
+                yield filepath, futures[i].result(), None
+            except Exception as e:
+                yield filepath, None, e
+
+def apply_closest_pair_algorithm(jobs=1):
     """Apply closest pair algorithm to all datasets"""
     print("\n" + "="*80)
     print("APPLYING CLOSEST PAIR OF POINTS ALGORITHM")
@@ -131,42 +200,29 @@ def apply_closest_pair_algorithm():
     
     # Find all closest pair input files
     files = sorted([f for f in os.listdir(dataset_dir) if f.startswith('closest_pair_input_')])
+    filepaths = [os.path.join(dataset_dir, f) for f in files]
     
-    for i, filename in enumerate(files, 1):
-        filepath = os.path.join(dataset_dir, filename)
+    for i, (filepath, result, error) in enumerate(run_datasets(run_closest_pair_dataset, filepaths, jobs), 1):
+        filename = os.path.basename(filepath)
         print(f"\n[Dataset {i}] Processing: {filename}")
         print("-" * 80)
         
-        try:
-            # Read points
-            points = read_points_file(filepath)
-            print(f"Number of points: {len(points)}")
-            
-            # Measure execution time
-            start_time = time.time()
-            pair, min_dist = closest_pair_of_points(points)
-            end_time = time.time()
-            
-            execution_time = (end_time - start_time) * 1000  # Convert to milliseconds
-            
-            # Display results
-            print(f"\n✓ Closest pair found:")
-            print(f"  Point 1: ({pair[0][0]:.6f}, {pair[0][1]:.6f})")
-            print(f"  Point 2: ({pair[1][0]:.6f}, {pair[1][1]:.6f})")
-            print(f"  Distance: {min_dist:.6f}")
-            print(f"  Execution time: {execution_time:.4f} ms")
-            
-            # Store results
-            results.append({
-                'dataset': filename,
-                'num_points': len(points),
-                'pair': pair,
-                'distance': min_dist,
-                'time_ms': execution_time
-            })
-            
-        except Exception as e:
-            print(f"✗ Error processing {filename}: {str(e)}")
+        if error is not None:
+            print(f"✗ Error processing {filename}: {str(error)}")
+            continue
+        
+        pair = result['pair']
+        print(f"Number of points: {result['num_points']}")
+        
+        # Display results
+        print(f"\n✓ Closest pair found:")
+        print(f"  Point 1: ({pair[0][0]:.6f}, {pair[0][1]:.6f})")
+        print(f"  Point 2: ({pair[1][0]:.6f}, {pair[1][1]:.6f})")
+        print(f"  Distance: {result['distance']:.6f}")
+        print(f"  Execution time: {result['time_ms']:.4f} ms")
+        
+        # Store results
+        results.append(result)
     
     # Save results to file
     output_file = os.path.join(dataset_dir, 'closest_pair_results.txt')
@@ -187,7 +243,7 @@ def apply_closest_pair_algorithm():
     print(f"\n✓ Results saved to: {output_file}")
     return results
 
-def apply_karatsuba_algorithm():
+def apply_karatsuba_algorithm(jobs=1):
     """Apply Karatsuba multiplication to all datasets"""
     print("\n" + "="*80)
     print("APPLYING KARATSUBA INTEGER MULTIPLICATION ALGORITHM")
@@ -198,50 +254,30 @@ def apply_karatsuba_algorithm():
     
     # Find all integer multiplication input files
     files = sorted([f for f in os.listdir(dataset_dir) if f.startswith('integer_mult_input_')])
+    filepaths = [os.path.join(dataset_dir, f) for f in files]
     
-    for i, filename in enumerate(files, 1):
-        filepath = os.path.join(dataset_dir, filename)
+    for i, (filepath, result, error) in enumerate(run_datasets(run_karatsuba_dataset, filepaths, jobs), 1):
+        filename = os.path.basename(filepath)
         print(f"\n[Dataset {i}] Processing: {filename}")
         print("-" * 80)
         
-        try:
-            # Read integers
-            x, y = read_integers_file(filepath)
-            print(f"First integer digits:  {len(str(x))}")
-            print(f"Second integer digits: {len(str(y))}")
-            
-            # Measure execution time
-            start_time = time.time()
-            result = karatsuba(x, y)
-            end_time = time.time()
-            
-            execution_time = (end_time - start_time) * 1000  # Convert to milliseconds
-            
-            # Verify with standard multiplication
-            expected = x * y
-            is_correct = (result == expected)
-            
-            # Display results
-            print(f"\n✓ Multiplication completed:")
-            print(f"  Result digits: {len(str(result))}")
-            print(f"  First 50 digits: {str(result)[:50]}...")
-            print(f"  Last 50 digits:  ...{str(result)[-50:]}")
-            print(f"  Verification: {'PASSED' if is_correct else 'FAILED'}")
-            print(f"  Execution time: {execution_time:.4f} ms")
-            
-            # Store results
-            results.append({
-                'dataset': filename,
-                'x_digits': len(str(x)),
-                'y_digits': len(str(y)),
-                'result_digits': len(str(result)),
-                'result': result,
-                'verified': is_correct,
-                'time_ms': execution_time
-            })
-            
-        except Exception as e:
-            print(f"✗ Error processing {filename}: {str(e)}")
+        if error is not None:
+            print(f"✗ Error processing {filename}: {str(error)}")
+            continue
+        
+        print(f"First integer digits:  {result['x_digits']}")
+        print(f"Second integer digits: {result['y_digits']}")
+        
+        # Display results
+        print(f"\n✓ Multiplication completed:")
+        print(f"  Result digits: {result['result_digits']}")
+        print(f"  First 50 digits: {str(result['result'])[:50]}...")
+        print(f"  Last 50 digits:  ...{str(result['result'])[-50:]}")
+        print(f"  Verification: {'PASSED' if result['verified'] else 'FAILED'}")
+        print(f"  Execution time: {result['time_ms']:.4f} ms")
+        
+        # Store results
+        results.append(result)
     
     # Save results to file
     output_file = os.path.join(dataset_dir, 'integer_mult_results.txt')
@@ -306,6 +342,10 @@ def analyze_performance(closest_pair_results, karatsuba_results):
 # MAIN EXECUTION
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply divide and conquer algorithms to the generated datasets")
+    parser.add_argument('--jobs', type=int, default=1, help="worker processes to spread datasets across (default: 1)")
+    args = parser.parse_args()
+    
     print("="*80)
     print("QUESTION 3: APPLYING DIVIDE AND CONQUER ALGORITHMS TO DATASETS")
     print("="*80)
@@ -316,8 +356,8 @@ if __name__ == "__main__":
         print("Please run Question 2 code first to generate datasets.")
     else:
         # Apply algorithms
-        closest_results = apply_closest_pair_algorithm()
-        karatsuba_results = apply_karatsuba_algorithm()
+        closest_results = apply_closest_pair_algorithm(args.jobs)
+        karatsuba_results = apply_karatsuba_algorithm(args.jobs)
         
         # Analyze performance
         analyze_performance(closest_results, karatsuba_results)
@@ -12,10 +12,12 @@ import json
 import os
 from werkzeug.utils import secure_filename
 import io
+from operator import itemgetter
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['UPLOAD_FOLDER'] = 'uploads'
+app.config['MAX_VIS_POINTS'] = 5000
 
 # Create uploads directory
 os.makedirs('uploads', exist_ok=True)
@@ -198,6 +200,56 @@ def parse_integers_file(file_content):
     y = int(lines[1].strip())
     return x, y
 
+# ============================================================================
+# LEVEL OF DETAIL
+# ============================================================================
+
+def point_bounds(points):
+    """Bounding box and the four extreme points (min/max x, min/max y)"""
+    if not points:
+        return None, []
+    extremes = [min(points, key=itemgetter(0)), max(points, key=itemgetter(0)),
+                min(points, key=itemgetter(1)), max(points, key=itemgetter(1))]
+    bounds = {
+        'min_x': extremes[0][0],
+        'max_x': extremes[1][0],
+        'min_y': extremes[2][1],
+        'max_y': extremes[3][1]
+    }
+    return bounds, extremes
+
+def decimate_points(points, max_points, keep=()):
+    """Thin points to at most max_points with one point per grid cell.
+    
+    The points in keep (e.g. the closest pair) and the extremes on each axis
+    are always retained so the drawing shows the answer at the right scale.
+    """
+    if max_points <= 0 or len(points) <= max_points:
+        return points
+    
+    bounds, extremes = point_bounds(points)
+    keep = [tuple(p) for p in keep if p] + [tuple(p) for p in extremes]
+    budget = max(max_points - len(keep), 1)
+    side = max(1, math.isqrt(budget))
+    scale_x = side / ((bounds['max_x'] - bounds['min_x']) or 1.0)
+    scale_y = side / ((bounds['max_y'] - bounds['min_y']) or 1.0)
+    min_x, min_y = bounds['min_x'], bounds['min_y']
+    last = side - 1
+    
+    cells = {}
+    for x, y in points:
+        cell = min(int((x - min_x) * scale_x), last) * side + min(int((y - min_y) * scale_y), last)
+        if cell not in cells:
+            cells[cell] = (x, y)
+    
+    sampled = list(cells.values())
+    seen = set(sampled)
+    for p in keep:
+        if p not in seen:
+            sampled.append(p)
+            seen.add(p)
+    return sampled
+
 # ============================================================================
 # FLASK ROUTES
 # ============================================================================
@@ -227,10 +279,17 @@ def api_closest_pair():
         
         execution_time = (end_time - start_time) * 1000
         
+        max_points = request.values.get('max_points', app.config['MAX_VIS_POINTS'], type=int)
+        bounds, _ = point_bounds(points)
+        visible_points = decimate_points(points, max_points, pair or ())
+        
         return jsonify({
             'success': True,
             'num_points': len(points),
-            'points': points,
+            'points': visible_points,
+            'points_returned': len(visible_points),
+            'decimated': len(visible_points) < len(points),
+            'bounds': bounds,
             'closest_pair': pair,
             'distance': dist,
             'execution_time_ms': execution_time,
@@ -617,7 +676,7 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
                 
                 if (data.success) {
                     displayClosestPairResults(data);
-                    drawPoints(data.points, data.closest_pair);
+                    drawPoints(data.points, data.closest_pair, data.bounds);
                 } else {
                     displayError('closestPairResults', data.error);
                 }
@@ -750,7 +809,7 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             results.classList.add('show');
         }
         
-        function drawPoints(points, closestPair) {
+        function drawPoints(points, closestPair, bounds) {
             const canvas = document.getElementById('closestPairCanvas');
             const ctx = canvas.getContext('2d');
             
@@ -761,13 +820,18 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             // Clear canvas
             ctx.clearRect(0, 0, canvas.width, canvas.height);
             
-            // Find bounds
-            const xs = points.map(p => p[0]);
-            const ys = points.map(p => p[1]);
-            const minX = Math.min(...xs);
-            const maxX = Math.max(...xs);
-            const minY = Math.min(...ys);
-            const maxY = Math.max(...ys);
+            // Find bounds (spreading large arrays into Math.min/max overflows the call stack)
+            let minX = Infinity, maxX = -Infinity, minY = Infinity, maxY = -Infinity;
+            if (bounds) {
+                ({ min_x: minX, max_x: maxX, min_y: minY, max_y: maxY } = bounds);
+            } else {
+                for (const p of points) {
+                    if (p[0] < minX) minX = p[0];
+                    if (p[0] > maxX) maxX = p[0];
+                    if (p[1] < minY) minY = p[1];
+                    if (p[1] > maxY) maxY = p[1];
+                }
+            }
             
             const padding = 40;
             const scaleX = (canvas.width - 2 * padding) / (maxX - minX);